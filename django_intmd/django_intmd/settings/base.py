@@ -93,15 +93,36 @@ TEMPLATES = [
 WSGI_APPLICATION = "django_intmd.wsgi.application"  # Gunicorn
 ASGI_APPLICATION = "django_intmd.asgi.application"  # Daphne
 
+# Redis
+REDIS_HOST = env.str("REDIS_HOST", default="redis")
+REDIS_PORT = env.int("REDIS_PORT", default=6379)
+REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
+REDIS_CLIENT_CLASS = "redis.Redis"
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [(env.str("REDIS_HOST", default="redis"), env.int("REDIS_PORT", default=6379))],
+            "hosts": [(REDIS_HOST, REDIS_PORT)],
         },
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/1",
+    }
+}
+
+# Chat
+CHAT_HISTORY_CACHE_TTL = env.int("CHAT_HISTORY_CACHE_TTL", default=60 * 60)
+CHAT_MEMBERSHIP_CACHE_TTL = env.int("CHAT_MEMBERSHIP_CACHE_TTL", default=60 * 60)
+# Write-behind broadcasts messages first and inserts them in batches; enable it on every chat worker or none.
+CHAT_WRITE_BEHIND = env.bool("CHAT_WRITE_BEHIND", default=False)
+CHAT_WRITE_BEHIND_BATCH_SIZE = env.int("CHAT_WRITE_BEHIND_BATCH_SIZE", default=100)
+CHAT_WRITE_BEHIND_FLUSH_INTERVAL = env.float("CHAT_WRITE_BEHIND_FLUSH_INTERVAL", default=0.5)
+
 # Database
 DATABASES = {
     "default": {
@@ -114,6 +135,13 @@ DATABASES = {
     }
 }
 
+# Recruitment
+# the default keyword search relies on the FULLTEXT index only MySQL has
+RECRUITMENT_SEARCH_BACKEND = env.str(
+    "RECRUITMENT_SEARCH_BACKEND", default="matching_app.pkg.recruitment_search.FullTextSearchBackend"
+)
+RECRUITMENT_TIMELINE_CACHE_TTL = env.int("RECRUITMENT_TIMELINE_CACHE_TTL", default=5 * 60)
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
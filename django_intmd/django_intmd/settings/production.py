@@ -0,0 +1,21 @@
+from django_intmd.settings.base import *
+
+logger = structlog.get_logger(__name__)
+
+# Run with DJANGO_SETTINGS_MODULE=django_intmd.settings.production
+
+CACHES = {
+    **CACHES,
+    # sessions get their own Redis database, so flushing or evicting page caches never logs anyone out
+    "sessions": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/2",
+    },
+}
+
+# sessions are read from Redis and only fall back to MySQL on a miss; writes still go through to MySQL,
+# so a Redis restart does not log users out
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "sessions"
+
+logger.info("Production mode", session_engine=SESSION_ENGINE, caches=list(CACHES))
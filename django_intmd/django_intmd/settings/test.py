@@ -9,7 +9,20 @@ DATABASES = {
     }
 }
 
-CACHE = {
+# the production hasher is deliberately slow and dominated the suite's run time
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+    }
+}
+
+REDIS_CLIENT_CLASS = "fakeredis.FakeRedis"
+
+RECRUITMENT_SEARCH_BACKEND = "matching_app.pkg.recruitment_search.InvertedIndexSearchBackend"
+
+CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         "LOCATION": "unique-snowflake",
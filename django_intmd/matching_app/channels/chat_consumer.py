@@ -1,20 +1,130 @@
+import atexit
 import json
+from datetime import datetime
+from typing import Iterable, Optional
+from urllib.parse import parse_qs
 
 import structlog
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
+from matching_app.channels.message_writer import MessageIdAllocator, MessageWriteBuffer
 from matching_app.models.message import Message
 from matching_app.models.room import Room
+from matching_app.pkg.message_cache import RoomMessageCache
 
 logger = structlog.get_logger(__name__)
 
+CHAT_HISTORY_PAGE_SIZE = 50
+HISTORY_FRAME_MAX_BYTES = 64 * 1024
+HISTORY_MODE_STREAM = "stream"
+HISTORY_MODE_BATCH = "batch"
+HISTORY_MESSAGE_TYPE = "chat.history"
+LOAD_OLDER_MESSAGE_TYPE = "chat.load_older"
+OLDER_MESSAGES_MESSAGE_TYPE = "chat.older_messages"
+
+# history frames are assembled from messages encoded once each, without whitespace or ascii escaping
+compact_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+# one message beyond the page tells whether older history exists
+history_cache = RoomMessageCache(size=CHAT_HISTORY_PAGE_SIZE + 1)
+
+message_id_allocator = MessageIdAllocator()
+message_write_buffer = MessageWriteBuffer(cache=history_cache)
+atexit.register(message_write_buffer.flush_sync)
+
+
+def serialize_message(message: Message) -> dict:
+    return {
+        "id": message.id,
+        "message": message.content,
+        "sender": message.sender.username,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def encode_message(message: Message) -> str:
+    return compact_json_encoder.encode(serialize_message(message))
+
+
+def parse_history_cursor(cursor: dict) -> Optional[tuple[datetime, int]]:
+    if not isinstance(cursor, dict):
+        return None
+    try:
+        created_at = parse_datetime(cursor["created_at"])
+        message_id = int(cursor["id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, message_id
+
+
+def encode_history_frames(
+    encoded_messages: Iterable[str],
+    frame_type: str,
+    has_more: bool,
+    max_bytes: int = HISTORY_FRAME_MAX_BYTES,
+) -> list[str]:
+    """Pack encoded messages into as few JSON array frames as fit in `max_bytes` each; always returns at least one frame."""
+    frame_prefix = f'{{"type":"{frame_type}","has_more":{"true" if has_more else "false"},"messages":['
+    frame_suffix = "]}"
+    envelope_size = len(frame_prefix) + len(frame_suffix)
+
+    frames = []
+    chunk = []
+    chunk_size = envelope_size
+    for encoded_message in encoded_messages:
+        # one extra byte for the separating comma
+        encoded_size = len(encoded_message.encode("utf-8")) + 1
+        if chunk and chunk_size + encoded_size > max_bytes:
+            frames.append(frame_prefix + ",".join(chunk) + frame_suffix)
+            chunk = []
+            chunk_size = envelope_size
+        chunk.append(encoded_message)
+        chunk_size += encoded_size
+    frames.append(frame_prefix + ",".join(chunk) + frame_suffix)
+    return frames
+
+
+def get_history_mode(query_string: bytes) -> str:
+    mode = parse_qs(query_string.decode("latin-1")).get("history", [HISTORY_MODE_STREAM])[0]
+    if mode not in (HISTORY_MODE_STREAM, HISTORY_MODE_BATCH):
+        logger.warning("Unknown history mode", mode=mode)
+        return HISTORY_MODE_STREAM
+    return mode
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self) -> None:
-        self.room_id = self.scope["url_route"]["kwargs"]["room_id"]
+        self.room_id = int(self.scope["url_route"]["kwargs"]["room_id"])
         self.room_group_name = f"chat_{self.room_id}"
+        self.history_mode = get_history_mode(self.scope.get("query_string", b""))
+        # kept in memory so that disconnect only touches the database for a room that stayed empty
+        self.joined = False
+        self.had_history = False
+        self.saw_message = False
+
+        # the sender and the room are resolved once here so that each chat line costs a single INSERT
+        self.user = self.scope.get("user")
+        if self.user is None or not self.user.is_authenticated:
+            logger.warning("Unauthenticated chat connection", room_id=self.room_id)
+            await self.close()
+            return
+
+        membership = await database_sync_to_async(Room.objects.get_membership)(self.room_id)
+        if membership is None:
+            logger.warning("Chat room not found", room_id=self.room_id)
+            await self.close()
+            return
+
+        if not membership.is_member(self.user.id):
+            logger.warning("Chat connection from non-member", room_id=self.room_id, user_id=self.user.id)
+            await self.close()
+            return
 
         try:
             await self.channel_layer.group_add(self.room_group_name, self.channel_name)
@@ -29,43 +139,57 @@ class ChatConsumer(AsyncWebsocketConsumer):
             logger.error("Failed to accept connection", error=ex)
             await self.close()
             return
+        self.joined = True
 
-        message_history = await self.get_message_history(self.room_id)
-        for message in message_history:
-            await self.send(
-                text_data=json.dumps(
-                    {
-                        "message": message.content,
-                        "sender": message.sender.username,
-                        "created_at": message.created_at.isoformat(),
-                    }
-                )
-            )
+        if self.history_mode == HISTORY_MODE_BATCH:
+            message_history, has_more = await self.get_message_history_page()
+            for frame in encode_history_frames(message_history, HISTORY_MESSAGE_TYPE, has_more):
+                await self.send(text_data=frame)
+        else:
+            message_history = await self.get_message_history(self.room_id)
+            for encoded_message in message_history:
+                await self.send(text_data=encoded_message)
+        self.had_history = bool(message_history)
 
     async def disconnect(self, close_code: int) -> None:
+        if not getattr(self, "joined", False):
+            return
+
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
-        await self.delete_empty_room()
+        if settings.CHAT_WRITE_BEHIND:
+            try:
+                await message_write_buffer.flush()
+            except Exception as ex:
+                logger.error("Failed to flush messages on disconnect", error=ex)
+
+        # rooms with messages are the common case and cost no query; anything left behind goes to reap_empty_rooms
+        if not self.had_history and not self.saw_message:
+            await self.delete_empty_room()
 
     async def receive(self, text_data: str) -> None:
         decoded_text_data = json.loads(text_data)
 
-        required_fields = ["sender_id", "room_id", "message"]
-        for field in required_fields:
-            if field not in decoded_text_data:
-                logger.error("Missing required field", field=field)
-                return
+        if decoded_text_data.get("type") == LOAD_OLDER_MESSAGE_TYPE:
+            await self.send_older_messages(decoded_text_data.get("before"))
+            return
+
+        if "message" not in decoded_text_data:
+            logger.error("Missing required field", field="message")
+            return
 
         if not decoded_text_data["message"].strip():
             logger.warning("Empty message received")
             return
 
         try:
-            message = await self.create_message(
-                decoded_text_data["sender_id"], decoded_text_data["room_id"], decoded_text_data["message"]
-            )
+            if settings.CHAT_WRITE_BEHIND:
+                message = await self.create_message_write_behind(decoded_text_data["message"])
+            else:
+                message = await self.create_message(decoded_text_data["message"])
         except Exception as ex:
             logger.error("Failed to create message", error=ex)
             return
+        self.saw_message = True
 
         try:
             await self.channel_layer.group_send(
@@ -73,7 +197,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 {
                     "type": "chat.message",
                     "message": message.content,
-                    "sender": message.sender.username,
+                    "sender": self.user.username,
                     "created_at": message.created_at.isoformat(),
                 },
             )
@@ -87,6 +211,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if field not in event:
                 logger.error("Missing required field", field=field)
                 return
+        self.saw_message = True
 
         try:
             await self.send(
@@ -102,22 +227,73 @@ class ChatConsumer(AsyncWebsocketConsumer):
             logger.error("Failed to send message to client", error=ex)
             return
 
+    async def send_older_messages(self, before: dict) -> None:
+        cursor = parse_history_cursor(before)
+        if cursor is None:
+            logger.warning("Invalid history cursor", before=before)
+            return
+
+        older_messages, has_more = await self.get_message_history_page(before=cursor)
+        for frame in encode_history_frames(older_messages, OLDER_MESSAGES_MESSAGE_TYPE, has_more):
+            await self.send(text_data=frame)
+
+    async def get_message_history_page(self, before: Optional[tuple[datetime, int]] = None) -> tuple[list[str], bool]:
+        # fetch one extra row to tell the client whether an even older page exists
+        messages = await self.get_message_history(self.room_id, before=before, limit=CHAT_HISTORY_PAGE_SIZE + 1)
+        has_more = len(messages) > CHAT_HISTORY_PAGE_SIZE
+        if has_more:
+            messages = messages[1:]
+        return messages, has_more
+
     @database_sync_to_async
-    def get_message_history(self, room_id: int) -> list[Message]:
-        return list(Message.objects.filter(room_id=room_id).select_related("sender").order_by("created_at"))
+    def get_message_history(
+        self,
+        room_id: int,
+        before: Optional[tuple[datetime, int]] = None,
+        limit: int = CHAT_HISTORY_PAGE_SIZE,
+    ) -> list[str]:
+        if before is not None or limit > history_cache.size:
+            return [encode_message(message) for message in Message.objects.get_history(room_id, before, limit)]
+
+        cached_messages = history_cache.get(room_id)
+        if cached_messages is not None:
+            return cached_messages[-limit:]
+
+        version = history_cache.get_version(room_id)
+        encoded_messages = [
+            encode_message(message) for message in Message.objects.get_history(room_id, limit=history_cache.size)
+        ]
+        history_cache.fill(room_id, encoded_messages, version)
+        return encoded_messages[-limit:]
 
     @database_sync_to_async
-    def create_message(self, sender_id: int, room_id: int, content: str) -> Message:
-        sender = get_user_model().objects.get(pk=sender_id)
-        room = Room.objects.get(pk=room_id)
-        return Message.objects.create(
-            sender=sender,
-            room=room,
+    def create_message(self, content: str) -> Message:
+        # the already loaded sender is attached so that serializing the message needs no further query
+        message = Message.objects.create(
+            sender=self.user,
+            room_id=self.room_id,
+            content=content,
+        )
+        history_cache.append(self.room_id, encode_message(message))
+        return message
+
+    async def create_message_write_behind(self, content: str) -> Message:
+        """Give the message its id and timestamp now and leave the INSERT to the write buffer.
+
+        Fails when no id can be allocated; an auto-increment insert could take an id another worker has reserved.
+        """
+        message_id = await message_id_allocator.allocate()
+        message = Message(
+            id=message_id,
+            sender=self.user,
+            room_id=self.room_id,
             content=content,
+            created_at=timezone.now(),
         )
+        await message_write_buffer.add(message, encode_message(message))
+        return message
 
     @database_sync_to_async
     def delete_empty_room(self) -> None:
-        room = Room.objects.get(pk=self.room_id)
-        if not Message.objects.filter(room=room).exists():
-            room.delete()
+        # the emptiness check is part of the delete, so a room that is already gone or got a message is left alone
+        Room.objects.filter(pk=self.room_id, messages__isnull=True).delete()
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+from typing import Optional
+
+import structlog
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import Max
+
+from matching_app.models.message import Message
+from matching_app.models.room import Room
+from matching_app.pkg.message_cache import RoomMessageCache
+from matching_app.pkg.redis import get_redis_client
+
+logger = structlog.get_logger(__name__)
+
+MESSAGE_ID_SEQUENCE_KEY = "chat:message:id_seq"
+DEFAULT_MESSAGE_ID_BLOCK_SIZE = 100
+# a lost counter restarts this far above the table's maximum, past ids reserved by workers but not inserted yet
+MESSAGE_ID_RESEED_GAP = 1_000_000
+# encoded messages that were broadcast but could never be inserted, kept for inspection
+MESSAGE_DEAD_LETTER_KEY = "chat:message:dead_letter"
+
+
+class MessageIdAllocator:
+    """Hands out message primary keys before the row is inserted.
+
+    Ids come from a Redis counter shared by every chat worker, seeded from the table's current maximum.
+    Each worker reserves a block at a time, so allocating an id is usually a local increment.
+    While write-behind is enabled, every chat worker must use it so auto-increment inserts cannot take a reserved id;
+    a message whose id cannot be allocated is rejected rather than inserted with an auto-increment id.
+    """
+
+    def __init__(self, block_size: int = DEFAULT_MESSAGE_ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self.next_id = 0
+        self.last_id = -1
+
+    async def allocate(self) -> int:
+        if self.next_id > self.last_id:
+            await sync_to_async(self.reserve_block)()
+        message_id = self.next_id
+        self.next_id += 1
+        return message_id
+
+    def reserve_block(self) -> None:
+        client = get_redis_client()
+        if not client.exists(MESSAGE_ID_SEQUENCE_KEY):
+            max_id = Message.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+            client.set(MESSAGE_ID_SEQUENCE_KEY, max_id + MESSAGE_ID_RESEED_GAP, nx=True)
+        last_id = client.incrby(MESSAGE_ID_SEQUENCE_KEY, self.block_size)
+        self.next_id = last_id - self.block_size + 1
+        self.last_id = last_id
+
+
+class MessageWriteBuffer:
+    """Collects already broadcast messages and inserts them with `bulk_create`.
+
+    A flush happens once CHAT_WRITE_BEHIND_BATCH_SIZE messages are pending or
+    CHAT_WRITE_BEHIND_FLUSH_INTERVAL seconds after the first pending one, whichever comes first.
+    Callers flush explicitly on disconnect, and `flush_sync` is registered to run at interpreter shutdown.
+    A batch that fails to insert is put back for the next flush, except for rows the database rejects
+    (e.g. a duplicate id), which are dead-lettered one by one so they cannot block the rest.
+    """
+
+    def __init__(self, cache: RoomMessageCache):
+        self.cache = cache
+        self.pending: list[tuple[Message, str]] = []
+        # writes run in a worker thread, so `pending` is only swapped or extended under the lock
+        self.lock = threading.Lock()
+        self.flush_task: Optional[asyncio.Task] = None
+
+    async def add(self, message: Message, encoded_message: str) -> None:
+        with self.lock:
+            self.pending.append((message, encoded_message))
+            pending_count = len(self.pending)
+        if pending_count >= settings.CHAT_WRITE_BEHIND_BATCH_SIZE:
+            try:
+                await self.flush()
+            except Exception:
+                # already logged by write; the message is pending again and can still be broadcast
+                return
+        elif not self.has_scheduled_flush():
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    def has_scheduled_flush(self) -> bool:
+        # a task left behind by an event loop that has since stopped will never run
+        return (
+            self.flush_task is not None
+            and not self.flush_task.done()
+            and self.flush_task.get_loop() is asyncio.get_running_loop()
+        )
+
+    async def flush_later(self) -> None:
+        await asyncio.sleep(settings.CHAT_WRITE_BEHIND_FLUSH_INTERVAL)
+        try:
+            await self.flush()
+        except Exception:
+            # already logged by write; the batch stays pending for the next flush
+            return
+
+    async def flush(self) -> None:
+        batch = self.take_pending()
+        if batch:
+            await database_sync_to_async(self.write)(batch)
+
+    def flush_sync(self) -> None:
+        batch = self.take_pending()
+        if batch:
+            self.write(batch)
+
+    def take_pending(self) -> list[tuple[Message, str]]:
+        with self.lock:
+            batch, self.pending = self.pending, []
+        return batch
+
+    def requeue(self, batch: list[tuple[Message, str]]) -> None:
+        with self.lock:
+            self.pending[:0] = batch
+
+    def write(self, batch: list[tuple[Message, str]]) -> None:
+        try:
+            with transaction.atomic():
+                Message.objects.bulk_create([message for message, _ in batch])
+        except (IntegrityError, DataError) as ex:
+            logger.warning("Failed to flush messages, writing them one by one", count=len(batch), error=ex)
+            batch = self.write_one_by_one(batch)
+        except Exception as ex:
+            logger.error("Failed to flush messages", count=len(batch), error=ex)
+            # keep them for the next flush instead of dropping already delivered messages
+            self.requeue(batch)
+            raise
+
+        self.record_written(batch)
+
+    def write_one_by_one(self, batch: list[tuple[Message, str]]) -> list[tuple[Message, str]]:
+        """Insert the rows of a rejected batch separately, dead-letter the rejected ones and return the written ones."""
+        written = []
+        for index, (message, encoded_message) in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    Message.objects.bulk_create([message])
+            except (IntegrityError, DataError) as ex:
+                self.dead_letter(message, encoded_message, ex)
+            except Exception as ex:
+                logger.error("Failed to flush messages", count=len(batch) - index, error=ex)
+                self.record_written(written)
+                self.requeue(batch[index:])
+                raise
+            else:
+                written.append((message, encoded_message))
+        return written
+
+    @staticmethod
+    def dead_letter(message: Message, encoded_message: str, error: Exception) -> None:
+        logger.error(
+            "Dropping message the database rejected", message_id=message.id, room_id=message.room_id, error=error
+        )
+        try:
+            get_redis_client().rpush(MESSAGE_DEAD_LETTER_KEY, encoded_message)
+        except Exception as ex:
+            logger.error("Failed to dead-letter message", message_id=message.id, error=ex)
+
+    def record_written(self, batch: list[tuple[Message, str]]) -> None:
+        # bulk_create sends no post_save, so the room summaries are updated here, once per room
+        latest_messages = {message.room_id: message for message, _ in batch}
+        for message in latest_messages.values():
+            Room.objects.record_last_message(message.room_id, message.sender_id, message.content, message.created_at)
+        self.cache.append_many([(message.room_id, encoded_message) for message, encoded_message in batch])
@@ -28,6 +28,12 @@ class RecruitmentForm(forms.ModelForm):
 
 
 class SearchRecruitmentForm(forms.Form):
+    keywords = forms.CharField(
+        required=False,
+        max_length=100,
+        label="Keywords",
+        widget=forms.TextInput(attrs={"class": "input", "placeholder": "Keywords", "id": "keywords"}),
+    )
     min_age = forms.IntegerField(
         required=False,
         label="Min Age",
@@ -49,4 +55,5 @@ class SearchRecruitmentForm(forms.Form):
         if min_age and max_age and min_age > max_age:
             raise ValidationError("Min age must be less than max age")
 
+        cleaned_data["keywords"] = cleaned_data.get("keywords", "").strip()
         return cleaned_data
@@ -29,7 +29,13 @@ class UserProfileForm(forms.ModelForm):
     class Meta:
         model = UserProfile
         fields = ["address", "occupation", "biography"]
-        exclude = ["user", "age"]
+        exclude = [
+            "user",
+            "likes_received_count",
+            "likes_sent_count",
+            "likes_changed_at",
+            "recommendations_scored_at",
+        ]
         widgets = {
             "address": forms.TextInput(
                 attrs={
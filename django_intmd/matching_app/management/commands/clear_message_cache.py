@@ -0,0 +1,19 @@
+import structlog
+from django.core.management.base import BaseCommand
+
+from matching_app.pkg.message_cache import RoomMessageCache
+
+logger = structlog.get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop the cached chat histories of every room. Run after migrations that move messages between rooms "
+        "(e.g. 0006_room_member_pair), since migrations do not touch Redis."
+    )
+
+    def handle(self, *args, **options):
+        deleted_keys = RoomMessageCache().invalidate_all()
+
+        logger.info("cleared message cache", deleted_keys=deleted_keys)
+        self.stdout.write(f"Deleted {deleted_keys} cached message keys")
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+import structlog
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from matching_app.models import UserVerification
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_EXPIRED_FOR_HOURS = 24
+DEFAULT_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete never activated users whose verification code expired long ago, in small batches. "
+        "Safe to interrupt and run again. Meant to run periodically (e.g. cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--expired-for-hours",
+            type=int,
+            default=DEFAULT_EXPIRED_FOR_HOURS,
+            help="Only purge verifications that expired at least this many hours ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        expired_before = timezone.now() - timedelta(hours=options["expired_for_hours"])
+        batch_size = options["batch_size"]
+
+        deleted_users = self.purge_users(expired_before, batch_size)
+
+        logger.info("purged unverified users", deleted_users=deleted_users, expired_before=expired_before)
+        self.stdout.write(f"Deleted {deleted_users} unverified users")
+
+    def purge_users(self, expired_before, batch_size: int) -> int:
+        User = get_user_model()
+        stale = UserVerification.objects.filter(expired_at__lt=expired_before, user__is_active=False)
+        deleted_users = 0
+        last_id = 0
+        while True:
+            rows = list(stale.filter(id__gt=last_id).order_by("id").values_list("id", "user_id")[:batch_size])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            # checked again by the delete itself, so a user who verified or got a new code in the meantime survives
+            _, deleted_per_model = User.objects.filter(
+                id__in=[user_id for _, user_id in rows],
+                is_active=False,
+                userverification__expired_at__lt=expired_before,
+            ).delete()
+            deleted_users += deleted_per_model.get(User._meta.label, 0)
+        return deleted_users
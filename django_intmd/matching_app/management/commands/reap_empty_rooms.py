@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+import structlog
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from matching_app.models import Room
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_OLDER_THAN_MINUTES = 60
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Delete chat rooms that never received a message, in batches. Meant to run periodically (e.g. cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-minutes",
+            type=int,
+            default=DEFAULT_OLDER_THAN_MINUTES,
+            help="Only delete rooms created at least this many minutes ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        created_before = timezone.now() - timedelta(minutes=options["older_than_minutes"])
+        batch_size = options["batch_size"]
+
+        empty_rooms = Room.objects.filter(created_at__lt=created_before, messages__isnull=True)
+        deleted_rooms = 0
+        while True:
+            room_ids = list(empty_rooms.values_list("id", flat=True)[:batch_size])
+            if not room_ids:
+                break
+            # emptiness is checked again by the delete itself, so a room that just got its first message survives
+            _, deleted_per_model = Room.objects.filter(id__in=room_ids, messages__isnull=True).delete()
+            deleted_rooms += deleted_per_model.get(Room._meta.label, 0)
+
+        logger.info("reaped empty rooms", deleted_rooms=deleted_rooms, created_before=created_before)
+        self.stdout.write(f"Deleted {deleted_rooms} empty rooms")
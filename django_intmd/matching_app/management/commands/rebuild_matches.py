@@ -0,0 +1,20 @@
+import structlog
+from django.core.management.base import BaseCommand
+
+from matching_app.models import Match
+from matching_app.models.match import DEFAULT_REBUILD_BATCH_SIZE
+
+logger = structlog.get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Rebuild matches from mutual likes in batches, creating missing matches and deleting stale ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        mutual_likes, deleted_matches = Match.objects.rebuild(batch_size=options["batch_size"])
+
+        logger.info("rebuilt matches", mutual_likes=mutual_likes, deleted_matches=deleted_matches)
+        self.stdout.write(f"Found {mutual_likes} mutual likes, deleted {deleted_matches} stale matches")
@@ -0,0 +1,20 @@
+import structlog
+from django.core.management.base import BaseCommand
+
+from matching_app.models import UserProfile
+from matching_app.models.user_profile import DEFAULT_RECONCILE_BATCH_SIZE
+
+logger = structlog.get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Recompute the like counters of every profile from UserLike in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_RECONCILE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        updated_profiles = UserProfile.objects.reconcile_like_counts(batch_size=options["batch_size"])
+
+        logger.info("reconciled like counts", updated_profiles=updated_profiles)
+        self.stdout.write(f"Updated like counts of {updated_profiles} profiles")
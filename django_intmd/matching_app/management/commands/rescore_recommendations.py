@@ -0,0 +1,55 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+import structlog
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from matching_app.models import UserRecommendation
+from matching_app.models.user_recommendation import DEFAULT_RECOMMENDATION_TOP_K, DEFAULT_RESCORE_BATCH_SIZE
+
+logger = structlog.get_logger(__name__)
+
+
+def init_worker() -> None:
+    # the parent closed its connections before forking, so this only drops what a worker set up on import;
+    # a spawned worker must set Django up first
+    connections.close_all()
+    django.setup()
+
+
+def rescore_batch(user_ids: list[int], top_k: int) -> tuple[int, int]:
+    return len(user_ids), UserRecommendation.objects.rescore(user_ids, top_k=top_k)
+
+
+class Command(BaseCommand):
+    help = (
+        "Score candidate pairs and store the top K recommendations per user. "
+        "Only users whose likes or profile changed since their last scoring are rescored unless --full is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=DEFAULT_RECOMMENDATION_TOP_K)
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_RESCORE_BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+        parser.add_argument("--full", action="store_true", help="Rescore every active user.")
+
+    def handle(self, *args, **options):
+        batches = UserRecommendation.objects.stale_user_ids(batch_size=options["batch_size"], full=options["full"])
+        score = partial(rescore_batch, top_k=options["top_k"])
+
+        if options["workers"] > 1:
+            # read every batch up front: pulling them lazily would reopen the parent's connection before the
+            # workers fork, and a worker closing its inherited copy would end the parent's database session
+            batches = list(batches)
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options["workers"], initializer=init_worker) as executor:
+                results = list(executor.map(score, batches))
+        else:
+            results = [score(user_ids) for user_ids in batches]
+
+        rescored_users = sum(user_count for user_count, _ in results)
+        recommendations = sum(recommendation_count for _, recommendation_count in results)
+        logger.info("rescored recommendations", rescored_users=rescored_users, recommendations=recommendations)
+        self.stdout.write(f"Rescored {rescored_users} users, stored {recommendations} recommendations")
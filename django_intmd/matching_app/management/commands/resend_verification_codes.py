@@ -0,0 +1,28 @@
+import time
+
+import structlog
+from django.core.management.base import BaseCommand
+
+from matching_app.models import UserVerification
+from matching_app.models.user_verification import DEFAULT_RESEND_BATCH_SIZE
+
+logger = structlog.get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Send new codes to every not yet activated user whose verification code expired, e.g. after a mail outage. "
+        "All emails go over one mail connection, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_RESEND_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        sent = UserVerification.objects.resend_expired(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started_at
+
+        emails_per_second = sent / elapsed if elapsed > 0 else 0.0
+        logger.info("resent verification codes", sent=sent, elapsed=elapsed, emails_per_second=emails_per_second)
+        self.stdout.write(f"Resent {sent} verification codes in {elapsed:.2f}s ({emails_per_second:.1f} emails/s)")
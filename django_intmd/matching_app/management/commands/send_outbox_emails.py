@@ -0,0 +1,55 @@
+import time
+
+import structlog
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from matching_app.models import EmailOutbox
+from matching_app.models.email_outbox import DEFAULT_OUTBOX_BATCH_SIZE
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_IDLE_SECONDS = 5.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the emails queued in the outbox, in batches over one mail connection each. "
+        "Failed emails are retried with exponential backoff. With --loop, keeps running as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_OUTBOX_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outbox instead of exiting.")
+        parser.add_argument(
+            "--idle-seconds",
+            type=float,
+            default=DEFAULT_IDLE_SECONDS,
+            help="With --loop, how long to wait when no email is due.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.drain(options["batch_size"])
+            if not options["loop"]:
+                break
+            if sent == 0 and failed == 0:
+                time.sleep(options["idle_seconds"])
+            # a long running worker must not keep a connection the database already dropped
+            close_old_connections()
+
+        self.stdout.write(f"Sent {sent} emails, {failed} failed")
+
+    def drain(self, batch_size: int) -> tuple[int, int]:
+        total_sent, total_failed = 0, 0
+        while True:
+            emails = EmailOutbox.objects.claim_due(batch_size)
+            if not emails:
+                break
+            sent, failed = EmailOutbox.objects.send_batch(emails)
+            total_sent += sent
+            total_failed += failed
+
+        if total_sent or total_failed:
+            logger.info("sent outbox emails", sent=total_sent, failed=total_failed)
+        return total_sent, total_failed
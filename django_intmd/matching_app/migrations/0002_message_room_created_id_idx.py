@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["room", "created_at", "id"], name="message_room_created_id_idx"),
+        ),
+    ]
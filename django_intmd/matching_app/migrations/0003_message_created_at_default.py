@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 19:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0002_message_room_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="message",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+BACKFILL_BATCH_SIZE = 1000
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+
+
+def backfill_room_last_message(apps, schema_editor):
+    Room = apps.get_model("matching_app", "Room")
+    Message = apps.get_model("matching_app", "Message")
+
+    latest_message = Message.objects.filter(room_id=OuterRef("pk")).order_by("-created_at", "-id")
+    last_message_at = Subquery(latest_message.values("created_at")[:1])
+
+    # walk the rooms by primary key range so that each UPDATE stays short
+    max_room_id = Room.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    for start_id in range(0, max_room_id + 1, BACKFILL_BATCH_SIZE):
+        Room.objects.filter(id__gte=start_id, id__lt=start_id + BACKFILL_BATCH_SIZE).update(
+            last_message_content=Coalesce(
+                Substr(Subquery(latest_message.values("content")[:1]), 1, LAST_MESSAGE_PREVIEW_LENGTH), Value("")
+            ),
+            last_message_sender_id=Subquery(latest_message.values("sender_id")[:1]),
+            last_message_at=last_message_at,
+            last_activity_at=Coalesce(last_message_at, F("created_at")),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0004_room_last_message"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_room_last_message, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.1 on 2026-10-18 19:14
+
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+UPDATE_BATCH_SIZE = 1000
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+
+
+def assign_room_member_pairs(apps, schema_editor):
+    Room = apps.get_model("matching_app", "Room")
+    RoomMember = apps.get_model("matching_app", "RoomMember")
+    Message = apps.get_model("matching_app", "Message")
+
+    room_ids_by_pair = defaultdict(list)
+    memberships = RoomMember.objects.order_by("room_id", "user_id").values_list("room_id", "user_id")
+    for room_id, rows in groupby(memberships.iterator(), key=itemgetter(0)):
+        user_ids = sorted({user_id for _, user_id in rows})
+        if len(user_ids) == 2:
+            room_ids_by_pair[tuple(user_ids)].append(room_id)
+
+    # keep the oldest room of each pair and move the messages of its duplicates into it;
+    # cached histories of merged rooms are dropped afterwards by the clear_message_cache command
+    rooms = []
+    merged_room_ids = []
+    for (low_user_id, high_user_id), room_ids in room_ids_by_pair.items():
+        kept_room_id, *duplicate_room_ids = sorted(room_ids)
+        if duplicate_room_ids:
+            Message.objects.filter(room_id__in=duplicate_room_ids).update(room_id=kept_room_id)
+            Room.objects.filter(id__in=duplicate_room_ids).delete()
+            merged_room_ids.append(kept_room_id)
+        rooms.append(Room(id=kept_room_id, low_user_id=low_user_id, high_user_id=high_user_id))
+    Room.objects.bulk_update(rooms, ["low_user", "high_user"], batch_size=UPDATE_BATCH_SIZE)
+
+    latest_message = Message.objects.filter(room_id=OuterRef("pk")).order_by("-created_at", "-id")
+    last_message_at = Subquery(latest_message.values("created_at")[:1])
+    for start in range(0, len(merged_room_ids), UPDATE_BATCH_SIZE):
+        Room.objects.filter(id__in=merged_room_ids[start : start + UPDATE_BATCH_SIZE]).update(  # noqa: E203
+            last_message_content=Coalesce(
+                Substr(Subquery(latest_message.values("content")[:1]), 1, LAST_MESSAGE_PREVIEW_LENGTH), Value("")
+            ),
+            last_message_sender_id=Subquery(latest_message.values("sender_id")[:1]),
+            last_message_at=last_message_at,
+            last_activity_at=Coalesce(last_message_at, F("created_at")),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0005_backfill_room_last_message"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="room",
+            name="high_user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="room",
+            name="low_user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(assign_room_member_pairs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="room",
+            constraint=models.UniqueConstraint(fields=("low_user", "high_user"), name="room_unique_member_pair"),
+        ),
+    ]
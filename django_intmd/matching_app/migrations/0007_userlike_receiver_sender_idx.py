@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0006_room_member_pair"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userlike",
+            index=models.Index(fields=["receiver", "sender"], name="userlike_receiver_sender_idx"),
+        ),
+    ]
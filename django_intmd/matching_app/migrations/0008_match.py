@@ -0,0 +1,75 @@
+# Generated by Django 5.1 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_matches(apps, schema_editor):
+    UserLike = apps.get_model("matching_app", "UserLike")
+    Match = apps.get_model("matching_app", "Match")
+
+    reverse_like = UserLike.objects.filter(sender_id=OuterRef("receiver_id"), receiver_id=OuterRef("sender_id"))
+    mutual_likes = (
+        UserLike.objects.filter(Exists(reverse_like)).order_by("id").values_list("id", "sender_id", "receiver_id")
+    )
+    last_id = 0
+    while True:
+        likes = list(mutual_likes.filter(id__gt=last_id)[:BACKFILL_BATCH_SIZE])
+        if not likes:
+            break
+        last_id = likes[-1][0]
+        Match.objects.bulk_create(
+            [Match(user_id=sender_id, matched_user_id=receiver_id) for _, sender_id, receiver_id in likes]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0007_userlike_receiver_sender_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Match",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "matched_user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matched_by",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matches",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("user", "matched_user"), name="match_unique_user_pair")
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_matches, migrations.RunPython.noop),
+    ]
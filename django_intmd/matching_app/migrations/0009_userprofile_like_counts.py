@@ -0,0 +1,45 @@
+# Generated by Django 5.1 on 2026-10-18 19:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def like_count(UserLike, user_field: str):
+    likes = UserLike.objects.filter(**{user_field: OuterRef("user_id")}).order_by().values(user_field)
+    return Coalesce(Subquery(likes.annotate(count=Count("id")).values("count")), Value(0))
+
+
+def backfill_like_counts(apps, schema_editor):
+    UserProfile = apps.get_model("matching_app", "UserProfile")
+    UserLike = apps.get_model("matching_app", "UserLike")
+
+    max_profile_id = UserProfile.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    for start_id in range(0, max_profile_id + 1, BACKFILL_BATCH_SIZE):
+        UserProfile.objects.filter(id__gte=start_id, id__lt=start_id + BACKFILL_BATCH_SIZE).update(
+            likes_received_count=like_count(UserLike, "receiver_id"),
+            likes_sent_count=like_count(UserLike, "sender_id"),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0008_match"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="likes_received_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="likes_sent_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_like_counts, migrations.RunPython.noop),
+    ]
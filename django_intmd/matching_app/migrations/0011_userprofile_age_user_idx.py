@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0010_user_recommendation"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(fields=["age", "user"], name="userprofile_age_user_idx"),
+        ),
+    ]
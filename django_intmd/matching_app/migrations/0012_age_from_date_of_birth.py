@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-18 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("matching_app", "0011_userprofile_age_user_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="userprofile",
+            name="userprofile_age_user_idx",
+        ),
+        migrations.RemoveField(
+            model_name="userprofile",
+            name="age",
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["date_of_birth"], name="user_date_of_birth_idx"),
+        ),
+    ]
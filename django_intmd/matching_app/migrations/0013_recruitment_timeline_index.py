@@ -0,0 +1,21 @@
+# Generated by Django 5.1 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0012_age_from_date_of_birth"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="recruitment",
+            options={"ordering": ["-created_at", "-id"]},
+        ),
+        migrations.AddIndex(
+            model_name="recruitment",
+            index=models.Index(fields=["-created_at", "-id"], name="recruitment_created_id_idx"),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-18 20:05
+
+from django.db import migrations
+
+FULLTEXT_INDEX_NAME = "recruitment_title_content_ft"
+
+
+def create_fulltext_index(apps, schema_editor):
+    # only MySQL has FULLTEXT indexes; other databases search through the in-process backend
+    if schema_editor.connection.vendor != "mysql":
+        return
+    Recruitment = apps.get_model("matching_app", "Recruitment")
+    table = schema_editor.quote_name(Recruitment._meta.db_table)
+    # the ngram parser also splits text without spaces between words, such as Japanese
+    schema_editor.execute(
+        f"CREATE FULLTEXT INDEX {schema_editor.quote_name(FULLTEXT_INDEX_NAME)} ON {table} (title, content) WITH PARSER ngram"
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    Recruitment = apps.get_model("matching_app", "Recruitment")
+    table = schema_editor.quote_name(Recruitment._meta.db_table)
+    schema_editor.execute(f"DROP INDEX {schema_editor.quote_name(FULLTEXT_INDEX_NAME)} ON {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0013_recruitment_timeline_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 20:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matching_app", "0015_email_outbox"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userverification",
+            name="expired_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from matching_app.models.email_outbox import EmailOutbox
+from matching_app.models.match import Match
 from matching_app.models.message import Message
 from matching_app.models.recruitment import Recruitment
 from matching_app.models.room import Room
@@ -5,4 +7,5 @@ from matching_app.models.room_member import RoomMember
 from matching_app.models.user import User
 from matching_app.models.user_like import UserLike
 from matching_app.models.user_profile import UserProfile
+from matching_app.models.user_recommendation import UserRecommendation
 from matching_app.models.user_verification import UserVerification
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+import structlog
+from django.core.mail import EmailMessage, get_connection
+from django.db import models, transaction
+from django.utils import timezone
+
+from matching_app.models.base import BaseModel
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_OUTBOX_BATCH_SIZE = 100
+MAX_SEND_ATTEMPTS = 5
+# retries wait 1, 2, 4, 8... minutes, at most an hour
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=1)
+# a claimed email is not picked up by another worker for this long, even if its worker dies
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+class EmailOutboxManager(models.Manager):
+    def enqueue(self, subject: str, body: str, from_email: str, to_email: str) -> "EmailOutbox":
+        """Store an email to be sent by the outbox worker; written in the caller's transaction."""
+        return self.create(subject=subject, body=body, from_email=from_email, to_email=to_email)
+
+    def claim_due(self, batch_size: int = DEFAULT_OUTBOX_BATCH_SIZE) -> list["EmailOutbox"]:
+        """Return up to `batch_size` emails that are due and push them back by `CLAIM_TIMEOUT`,
+        so that concurrent workers skip them while they are being sent.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                self.select_for_update(skip_locked=True)
+                .filter(sent_at__isnull=True, next_attempt_at__lte=now, attempts__lt=MAX_SEND_ATTEMPTS)
+                .order_by("next_attempt_at", "id")[:batch_size]
+            )
+            self.filter(id__in=[email.id for email in emails]).update(next_attempt_at=now + CLAIM_TIMEOUT)
+        return emails
+
+    def send_batch(self, emails: list["EmailOutbox"]) -> tuple[int, int]:
+        """Send `emails` over one connection, record the outcome of each and return `(sent, failed)`."""
+        sent, failed = [], []
+        try:
+            with get_connection() as connection:
+                for email in emails:
+                    try:
+                        email.to_message(connection).send()
+                    except Exception as ex:
+                        logger.warning("Failed to send outbox email", email_id=email.id, error=ex)
+                        email.last_error = str(ex)
+                        failed.append(email)
+                    else:
+                        sent.append(email)
+        except Exception as ex:
+            # opening or closing the connection failed; whatever was not sent yet is retried
+            logger.error("Failed to open mail connection", error=ex)
+            for email in emails:
+                if email not in sent and email not in failed:
+                    email.last_error = str(ex)
+                    failed.append(email)
+
+        now = timezone.now()
+        self.filter(id__in=[email.id for email in sent]).update(sent_at=now, last_error="")
+        for email in failed:
+            email.attempts += 1
+            email.next_attempt_at = now + get_retry_delay(email.attempts)
+            if email.attempts >= MAX_SEND_ATTEMPTS:
+                logger.error("Giving up on outbox email", email_id=email.id, attempts=email.attempts)
+        self.bulk_update(failed, ["attempts", "next_attempt_at", "last_error"])
+        return len(sent), len(failed)
+
+
+class EmailOutbox(BaseModel):
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to_email = models.EmailField()
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = EmailOutboxManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sent_at", "next_attempt_at"], name="email_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.to_email} - {self.subject}"
+
+    def to_message(self, connection) -> EmailMessage:
+        return EmailMessage(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=[self.to_email],
+            connection=connection,
+        )
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Exists, OuterRef
+
+from matching_app.models.base import BaseModel
+from matching_app.models.user_like import UserLike
+
+DEFAULT_REBUILD_BATCH_SIZE = 1000
+
+
+class MatchManager(models.Manager):
+    def is_matched(self, user_id: int, other_user_id: int) -> bool:
+        return self.filter(user_id=user_id, matched_user_id=other_user_id).exists()
+
+    def sync_pair(self, user_id: int, other_user_id: int) -> None:
+        """Create or remove the match of two users so that it mirrors their likes. Call inside a transaction."""
+        like_count = UserLike.objects.filter(
+            models.Q(sender_id=user_id, receiver_id=other_user_id)
+            | models.Q(sender_id=other_user_id, receiver_id=user_id)
+        ).count()
+        if like_count == 2:
+            self.bulk_create(
+                [
+                    Match(user_id=user_id, matched_user_id=other_user_id),
+                    Match(user_id=other_user_id, matched_user_id=user_id),
+                ],
+                ignore_conflicts=True,
+            )
+        else:
+            self.filter(
+                models.Q(user_id=user_id, matched_user_id=other_user_id)
+                | models.Q(user_id=other_user_id, matched_user_id=user_id)
+            ).delete()
+
+    def rebuild(self, batch_size: int = DEFAULT_REBUILD_BATCH_SIZE) -> tuple[int, int]:
+        """Bring matches in line with likes, walking both tables by primary key in batches.
+
+        Returns the number of mutual likes seen and the number of stale matches deleted.
+        """
+        mutual_like_count = 0
+        reverse_like = UserLike.objects.filter(sender_id=OuterRef("receiver_id"), receiver_id=OuterRef("sender_id"))
+        mutual_likes = (
+            UserLike.objects.filter(Exists(reverse_like)).order_by("id").values_list("id", "sender_id", "receiver_id")
+        )
+        last_id = 0
+        while True:
+            likes = list(mutual_likes.filter(id__gt=last_id)[:batch_size])
+            if not likes:
+                break
+            last_id = likes[-1][0]
+            self.bulk_create(
+                [Match(user_id=sender_id, matched_user_id=receiver_id) for _, sender_id, receiver_id in likes],
+                ignore_conflicts=True,
+            )
+            mutual_like_count += len(likes)
+
+        deleted_matches = 0
+        like = UserLike.objects.filter(sender_id=OuterRef("user_id"), receiver_id=OuterRef("matched_user_id"))
+        reverse_like = UserLike.objects.filter(sender_id=OuterRef("matched_user_id"), receiver_id=OuterRef("user_id"))
+        last_id = 0
+        while True:
+            match_ids = list(self.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+            if not match_ids:
+                break
+            last_id = match_ids[-1]
+            deleted, _ = self.filter(id__in=match_ids).filter(~Exists(like) | ~Exists(reverse_like)).delete()
+            deleted_matches += deleted
+
+        return mutual_like_count, deleted_matches
+
+
+class Match(BaseModel):
+    # stored once per direction so that listing and checking a user's matches is a prefix lookup on one index
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="matches")
+    matched_user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="matched_by")
+
+    objects = MatchManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "matched_user"], name="match_unique_user_pair"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} matches {self.matched_user.username}"
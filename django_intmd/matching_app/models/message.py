@@ -1,14 +1,56 @@
+from datetime import datetime
+from typing import Optional
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
 
 from matching_app.models.base import BaseModel
 from matching_app.models.room import Room
 
+DEFAULT_MESSAGE_HISTORY_LIMIT = 50
+
+
+class MessageManager(models.Manager):
+    def get_history(
+        self,
+        room_id: int,
+        before: Optional[tuple[datetime, int]] = None,
+        limit: int = DEFAULT_MESSAGE_HISTORY_LIMIT,
+    ) -> list["Message"]:
+        """Return up to `limit` messages of the room older than the `(created_at, id)` cursor, oldest first."""
+        messages = self.filter(room_id=room_id)
+        if before is not None:
+            created_at, message_id = before
+            # keyset condition `(created_at, id) < (cursor)`; the `lte` bound lets the index serve a range scan.
+            messages = messages.filter(created_at__lte=created_at).filter(
+                models.Q(created_at__lt=created_at) | models.Q(created_at=created_at, id__lt=message_id)
+            )
+        newest_first = messages.select_related("sender").order_by("-created_at", "-id")[:limit]
+        return list(reversed(newest_first))
+
 
 class Message(BaseModel):
+    # a default instead of auto_now_add so that write-behind messages keep the timestamp they were broadcast with
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="messages")
     sender = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="sent_messages")
     content = models.TextField(blank=False, null=False)
 
+    objects = MessageManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["room", "created_at", "id"], name="message_room_created_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.sender.username} - {self.content[:20]}"
+
+
+@receiver(post_save, sender=Message)
+def update_room_last_message(instance, created, **kwargs):
+    if created:
+        Room.objects.record_last_message(instance.room_id, instance.sender_id, instance.content, instance.created_at)
@@ -1,7 +1,71 @@
+from datetime import date, datetime
+from typing import Optional
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from matching_app.models.base import BaseModel
+from matching_app.pkg.recruitment_search import get_recruitment_search_backend
+from matching_app.pkg.timeline_cache import RecruitmentTimelineCache
+
+DEFAULT_RECRUITMENT_TIMELINE_LIMIT = 10
+# user fields that are shown on, or filter, the cached timeline
+TIMELINE_USER_FIELDS = {"username", "icon", "date_of_birth"}
+
+
+class RecruitmentManager(models.Manager):
+    def by_users_born_between(
+        self, born_after: Optional[date] = None, born_on_or_before: Optional[date] = None
+    ) -> models.QuerySet:
+        recruitments = self.select_related("user")
+        if born_on_or_before is not None:
+            recruitments = recruitments.filter(user__date_of_birth__lte=born_on_or_before)
+        if born_after is not None:
+            recruitments = recruitments.filter(user__date_of_birth__gt=born_after)
+        return recruitments
+
+    def get_timeline_page(
+        self,
+        before: Optional[tuple[datetime, int]] = None,
+        limit: int = DEFAULT_RECRUITMENT_TIMELINE_LIMIT,
+        born_after: Optional[date] = None,
+        born_on_or_before: Optional[date] = None,
+    ) -> tuple[list["Recruitment"], Optional[tuple[datetime, int]]]:
+        """Return up to `limit` recruitments older than the `(created_at, id)` cursor, newest first,
+        and the cursor of the next page, or None on the last page.
+        """
+        recruitments = self.by_users_born_between(born_after, born_on_or_before)
+        if before is not None:
+            created_at, recruitment_id = before
+            # keyset condition `(created_at, id) < (cursor)`; the `lte` bound lets the index serve a range scan.
+            recruitments = recruitments.filter(created_at__lte=created_at).filter(
+                models.Q(created_at__lt=created_at) | models.Q(created_at=created_at, id__lt=recruitment_id)
+            )
+        # fetch one extra row to tell whether an older page exists, instead of counting
+        page = list(recruitments.order_by("-created_at", "-id")[: limit + 1])
+        if len(page) <= limit:
+            return page, None
+        page = page[:limit]
+        return page, (page[-1].created_at, page[-1].id)
+
+    def search(
+        self,
+        keywords: str,
+        offset: int = 0,
+        limit: int = DEFAULT_RECRUITMENT_TIMELINE_LIMIT,
+        born_after: Optional[date] = None,
+        born_on_or_before: Optional[date] = None,
+    ) -> tuple[list["Recruitment"], Optional[int]]:
+        """Return up to `limit` recruitments matching `keywords` from `offset`, most relevant first,
+        and the offset of the next page, or None on the last page.
+        """
+        recruitments = self.by_users_born_between(born_after, born_on_or_before)
+        page = get_recruitment_search_backend().search(recruitments, keywords, offset, limit + 1)
+        if len(page) <= limit:
+            return page, None
+        return page[:limit], offset + limit
 
 
 class Recruitment(BaseModel):
@@ -9,8 +73,38 @@ class Recruitment(BaseModel):
     title = models.CharField(max_length=100, blank=False, null=False)
     content = models.TextField(blank=False, null=False)
 
+    objects = RecruitmentManager()
+
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="recruitment_created_id_idx"),
+        ]
 
     def __str__(self):
         return self.title
+
+
+@receiver(post_save, sender=Recruitment)
+def index_recruitment(instance, **kwargs):
+    get_recruitment_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Recruitment)
+def remove_recruitment_from_index(instance, **kwargs):
+    get_recruitment_search_backend().remove(instance.id)
+
+
+@receiver(post_save, sender=Recruitment)
+@receiver(post_delete, sender=Recruitment)
+def invalidate_timeline(**kwargs):
+    # after commit, so that a page built in between cannot be cached under the new generation
+    transaction.on_commit(RecruitmentTimelineCache().bump_generation)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_timeline_for_user(instance, created, update_fields=None, **kwargs):
+    # logins only save last_login, which the timeline does not show
+    if created or (update_fields is not None and not TIMELINE_USER_FIELDS.intersection(update_fields)):
+        return
+    transaction.on_commit(RecruitmentTimelineCache().bump_generation)
@@ -1,15 +1,24 @@
+from datetime import datetime
+from typing import Optional
+
 import structlog
 from django.core.exceptions import ValidationError
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 
 from matching_app.models.base import BaseModel
 from matching_app.models.room_member import RoomMember
 from matching_app.models.user import User
 from matching_app.pkg.exceptions import NoOppositeUserError
+from matching_app.pkg.message_cache import RoomMessageCache
+from matching_app.pkg.room_membership import RoomMemberProfile, RoomMembership, RoomMembershipCache
 
 logger = structlog.get_logger(__name__)
 
 MAX_ROOM_MEMBERS = 2
+LAST_MESSAGE_PREVIEW_LENGTH = 100
 
 
 class RoomManager(models.Manager):
@@ -18,29 +27,78 @@ class RoomManager(models.Manager):
             logger.error("invalid number of users", users=users)
             raise ValidationError(f"Room must have exactly {MAX_ROOM_MEMBERS} members")
 
-        user_ids = sorted(user.id for user in users)
-
-        try:
-            existing_room = self.filter(members__user_id=user_ids[0]).filter(members__user_id=user_ids[1]).first()
-        except IndexError as ex:
-            logger.error("invalid user ids", user_ids=user_ids, error=ex)
-            raise ValidationError("Invalid user ids")
+        low_user_id, high_user_id = sorted(user.id for user in users)
+        if low_user_id == high_user_id:
+            logger.error("duplicate room member", user_id=low_user_id)
+            raise ValidationError("Room members must be different users")
 
+        existing_room = self.filter(low_user_id=low_user_id, high_user_id=high_user_id).first()
         if existing_room:
             return existing_room
 
-        with transaction.atomic():
-            room = self.create()
-            for user in users:
-                RoomMember.objects.create(room=room, user=user)
+        try:
+            with transaction.atomic():
+                room = self.create(low_user_id=low_user_id, high_user_id=high_user_id)
+                RoomMember.objects.bulk_create([RoomMember(room=room, user_id=user.id) for user in users])
+        except IntegrityError:
+            # a concurrent request created the room for this pair first
+            return self.get(low_user_id=low_user_id, high_user_id=high_user_id)
+        # bulk_create sends no post_save, so drop anything cached under a reused room id here
+        RoomMembershipCache().invalidate(room.id)
         return room
 
+    def get_membership(self, room_id: int) -> Optional[RoomMembership]:
+        """Return the room's members from the membership cache, or None if the room has no members."""
+        membership_cache = RoomMembershipCache()
+        membership = membership_cache.get(room_id)
+        if membership is not None:
+            return membership
+
+        room_members = RoomMember.objects.filter(room_id=room_id).select_related("user").order_by("user_id")
+        members = tuple(
+            RoomMemberProfile(
+                id=room_member.user.id,
+                username=room_member.user.username,
+                icon_url=room_member.user.icon.url if room_member.user.icon else "",
+            )
+            for room_member in room_members
+        )
+        if not members:
+            return None
+
+        membership = RoomMembership(room_id=room_id, members=members)
+        membership_cache.set(membership)
+        return membership
+
+    def record_last_message(self, room_id: int, sender_id: int, content: str, created_at: datetime) -> None:
+        """Update the room's last message summary unless it already shows a newer message."""
+        self.filter(pk=room_id).filter(
+            models.Q(last_message_at__isnull=True) | models.Q(last_message_at__lte=created_at)
+        ).update(
+            last_message_content=content[:LAST_MESSAGE_PREVIEW_LENGTH],
+            last_message_sender_id=sender_id,
+            last_message_at=created_at,
+            last_activity_at=created_at,
+        )
+
 
 class Room(BaseModel):
+    # denormalized from the newest message so that the chat list needs no per-room query
+    last_message_content = models.CharField(max_length=LAST_MESSAGE_PREVIEW_LENGTH, blank=True, default="")
+    last_message_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_activity_at = models.DateTimeField(default=timezone.now)
+    # the member pair ordered by user id, so that each pair has at most one room
+    low_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    high_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
     objects = RoomManager()
 
     class Meta:
         ordering = ["-updated_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["low_user", "high_user"], name="room_unique_member_pair"),
+        ]
 
     def get_opposite_user(self, current_user: User) -> User:
         opposite_member = self.members.exclude(user=current_user).select_related("user").first()
@@ -51,3 +109,8 @@ class Room(BaseModel):
 
     def __str__(self):
         return f"Room {self.id} with members {self.members.all()}"
+
+
+@receiver(post_delete, sender=Room)
+def invalidate_message_cache(instance, **kwargs):
+    RoomMessageCache().invalidate(instance.id)
@@ -1,7 +1,13 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from matching_app.models.base import BaseModel
+from matching_app.pkg.room_membership import RoomMembershipCache
+
+# user fields shown from the membership cache
+MEMBER_PROFILE_FIELDS = {"username", "icon"}
 
 
 class RoomMember(BaseModel):
@@ -14,3 +20,19 @@ class RoomMember(BaseModel):
 
     def __str__(self):
         return f"{self.room.id} - {self.user.username}"
+
+
+@receiver(post_save, sender=RoomMember)
+@receiver(post_delete, sender=RoomMember)
+def invalidate_room_membership(instance, **kwargs):
+    RoomMembershipCache().invalidate(instance.room_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_member_profiles(instance, created, update_fields=None, **kwargs):
+    # logins only save last_login, which the cache does not hold
+    if created or (update_fields is not None and not MEMBER_PROFILE_FIELDS.intersection(update_fields)):
+        return
+    membership_cache = RoomMembershipCache()
+    for room_id in RoomMember.objects.filter(user=instance).values_list("room_id", flat=True):
+        membership_cache.invalidate(room_id)
@@ -1,14 +1,18 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-from matching_app.pkg.times import get_age_from_date_of_birth
+from matching_app.pkg.times import age_expression
 
 
 class UserManager(BaseUserManager):
+    def with_age(self) -> models.QuerySet:
+        """Annotate each user's current age, computed by the database from `date_of_birth`."""
+        return self.annotate(age=age_expression("date_of_birth", date.today()))
+
     def create_user(
         self,
         username: str,
@@ -69,13 +73,18 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "date_of_birth"]
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # age searches are turned into date of birth ranges
+            models.Index(fields=["date_of_birth"], name="user_date_of_birth_idx"),
+        ]
+
 
 @receiver(post_save, sender=User)
 def create_OneToOnes(instance, created, **kwargs):
     if created:
         from matching_app.models import UserProfile, UserVerification
 
-        age = get_age_from_date_of_birth(instance.date_of_birth)
-        UserProfile.objects.create(user=instance, age=age)
+        UserProfile.objects.create(user=instance)
         user_verification = UserVerification.objects.create(user=instance)
         user_verification.send_new_verification_code()
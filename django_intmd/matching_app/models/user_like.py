@@ -10,6 +10,9 @@ class UserLike(BaseModel):
 
     class Meta:
         unique_together = ("sender", "receiver")
+        indexes = [
+            models.Index(fields=["receiver", "sender"], name="userlike_receiver_sender_idx"),
+        ]
 
     def __str__(self):
         return f"{self.sender.username} likes {self.receiver.username}"
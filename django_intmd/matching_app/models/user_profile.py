@@ -1,15 +1,54 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 
 from matching_app.models.base import BaseModel
+from matching_app.models.user_like import UserLike
+
+DEFAULT_RECONCILE_BATCH_SIZE = 1000
+
+
+def count_likes(user_field: str) -> Coalesce:
+    likes = UserLike.objects.filter(**{user_field: OuterRef("user_id")}).order_by().values(user_field)
+    return Coalesce(Subquery(likes.annotate(count=Count("id")).values("count")), Value(0))
+
+
+class UserProfileManager(models.Manager):
+    def reconcile_like_counts(self, batch_size: int = DEFAULT_RECONCILE_BATCH_SIZE) -> int:
+        """Recompute the like counters from UserLike in primary key batches and return how many profiles changed."""
+        updated_profiles = 0
+        last_id = 0
+        while True:
+            profile_ids = list(self.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+            if not profile_ids:
+                break
+            last_id = profile_ids[-1]
+
+            # counted inside the UPDATE itself, so a like toggled while this runs cannot be overwritten by a stale count
+            received_count, sent_count = count_likes("receiver_id"), count_likes("sender_id")
+            updated_profiles += (
+                self.filter(id__in=profile_ids)
+                .filter(~Q(likes_received_count=received_count) | ~Q(likes_sent_count=sent_count))
+                .update(likes_received_count=received_count, likes_sent_count=sent_count)
+            )
+
+        return updated_profiles
 
 
 class UserProfile(BaseModel):
     user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE)
-    age = models.IntegerField(blank=False, null=False, default=0)
     address = models.CharField(max_length=100, blank=True, null=False)
     occupation = models.CharField(max_length=100, blank=True, null=False)
     biography = models.TextField(blank=True, null=False)
+    # denormalized from UserLike by the like toggle; reconcile_like_counts repairs any drift
+    likes_received_count = models.PositiveIntegerField(default=0)
+    likes_sent_count = models.PositiveIntegerField(default=0)
+    # compared by rescore_recommendations to find users whose recommendations are out of date
+    likes_changed_at = models.DateTimeField(null=True, blank=True)
+    recommendations_scored_at = models.DateTimeField(null=True, blank=True)
+
+    objects = UserProfileManager()
 
     def __str__(self):
         return self.user.username
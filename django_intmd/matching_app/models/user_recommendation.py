@@ -0,0 +1,120 @@
+from datetime import date
+from typing import Iterator
+
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from matching_app.models.user_like import UserLike
+from matching_app.models.user_profile import UserProfile
+from matching_app.pkg.recommendations import ProfileFeatures, top_candidates
+from matching_app.pkg.times import age_expression, get_date_of_birth_range
+
+DEFAULT_RECOMMENDATION_TOP_K = 100
+DEFAULT_RESCORE_BATCH_SIZE = 100
+# per user, how many co-liked and how many similar-profile candidates are scored
+CO_LIKED_CANDIDATE_LIMIT = 500
+SIMILAR_PROFILE_CANDIDATE_LIMIT = 500
+SIMILAR_AGE_RANGE = 5
+
+PROFILE_FEATURE_FIELDS = ("user_id", "age", "address", "occupation")
+
+
+def with_profile_features(profiles: models.QuerySet) -> models.QuerySet:
+    return profiles.annotate(age=age_expression("user__date_of_birth", date.today())).values(*PROFILE_FEATURE_FIELDS)
+
+
+def eligible_candidate_profiles(user_id: int) -> models.QuerySet:
+    """Profiles that may be recommended to `user_id`: active (verified), not the user and not already liked."""
+    liked = UserLike.objects.filter(sender_id=user_id, receiver_id=OuterRef("user_id"))
+    return UserProfile.objects.filter(user__is_active=True).exclude(user_id=user_id).filter(~Exists(liked))
+
+
+class UserRecommendationManager(models.Manager):
+    def stale_user_ids(self, batch_size: int = DEFAULT_RESCORE_BATCH_SIZE, full: bool = False) -> Iterator[list[int]]:
+        """Yield batches of active users whose recommendations are missing or older than their profile or likes."""
+        profiles = UserProfile.objects.filter(user__is_active=True)
+        if not full:
+            profiles = profiles.filter(
+                Q(recommendations_scored_at__isnull=True)
+                | Q(updated_at__gt=F("recommendations_scored_at"))
+                | Q(likes_changed_at__gt=F("recommendations_scored_at"))
+            )
+        last_id = 0
+        while True:
+            rows = list(profiles.filter(id__gt=last_id).order_by("id").values_list("id", "user_id")[:batch_size])
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [user_id for _, user_id in rows]
+
+    def rescore(self, user_ids: list[int], top_k: int = DEFAULT_RECOMMENDATION_TOP_K) -> int:
+        """Replace the recommendations of `user_ids` and return how many rows were written."""
+        # taken before reading, so a like or profile change made while scoring leaves the user stale
+        scored_at = timezone.now()
+        recommendations = []
+        for profile in with_profile_features(UserProfile.objects.filter(user_id__in=user_ids)):
+            profile = ProfileFeatures(**profile)
+            candidates, co_likers = self.find_candidates(profile)
+            recommendations.extend(
+                UserRecommendation(user_id=profile.user_id, candidate_id=candidate_id, score=score, rank=rank)
+                for rank, (candidate_id, score) in enumerate(top_candidates(profile, candidates, co_likers, top_k))
+            )
+
+        with transaction.atomic():
+            self.filter(user_id__in=user_ids).delete()
+            self.bulk_create(recommendations)
+            UserProfile.objects.filter(user_id__in=user_ids).update(recommendations_scored_at=scored_at)
+        return len(recommendations)
+
+    def find_candidates(self, profile: ProfileFeatures) -> tuple[list[ProfileFeatures], dict[int, int]]:
+        # users liked by the people who liked the same users as this one, counted per co-liker
+        liked_ids = UserLike.objects.filter(sender_id=profile.user_id).values("receiver_id")
+        co_liker_ids = (
+            UserLike.objects.filter(receiver_id__in=liked_ids).exclude(sender_id=profile.user_id).values("sender_id")
+        )
+        co_likers = dict(
+            UserLike.objects.filter(sender_id__in=co_liker_ids)
+            .values("receiver_id")
+            .annotate(count=Count("id"))
+            .order_by("-count")
+            .values_list("receiver_id", "count")[:CO_LIKED_CANDIDATE_LIMIT]
+        )
+
+        eligible_profiles = eligible_candidate_profiles(profile.user_id)
+        born_after, born_on_or_before = get_date_of_birth_range(
+            profile.age - SIMILAR_AGE_RANGE, profile.age + SIMILAR_AGE_RANGE, date.today()
+        )
+        similar = Q(user__date_of_birth__gt=born_after, user__date_of_birth__lte=born_on_or_before)
+        if profile.address:
+            similar |= Q(address=profile.address)
+        if profile.occupation:
+            similar |= Q(occupation=profile.occupation)
+
+        co_liked_profiles = with_profile_features(eligible_profiles.filter(user_id__in=list(co_likers)))
+        similar_profiles = with_profile_features(eligible_profiles.filter(similar).order_by("-likes_received_count"))
+
+        candidates = {}
+        for candidate_rows in (co_liked_profiles, similar_profiles[:SIMILAR_PROFILE_CANDIDATE_LIMIT]):
+            for candidate in candidate_rows:
+                candidates[candidate["user_id"]] = ProfileFeatures(**candidate)
+        return list(candidates.values()), co_likers
+
+
+class UserRecommendation(models.Model):
+    # kept narrow on purpose: one row per recommended candidate, rewritten wholesale by the rescore job
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="recommendations")
+    candidate = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="recommended_to")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    objects = UserRecommendationManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "rank"], name="recommendation_unique_user_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate_id} for {self.user_id} (#{self.rank})"
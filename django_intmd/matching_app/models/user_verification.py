@@ -4,23 +4,73 @@ from random import randint
 import django.utils.timezone
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.db import models
-from django.template.loader import render_to_string
+from django.template.loader import get_template, render_to_string
 
 from matching_app.models.base import BaseModel
+from matching_app.models.email_outbox import EmailOutbox
 from matching_app.pkg.times import calculate_expiration_time
 
 VERIFICATION_CODE_LENGTH = 6
 MIN_VERIFICATION_CODE = 10 ** (VERIFICATION_CODE_LENGTH - 1)
 MAX_VERIFICATION_CODE = (10**VERIFICATION_CODE_LENGTH) - 1
 DEFAULT_VERIFICATION_EXPIRATION_MINUTES = 60
+DEFAULT_RESEND_BATCH_SIZE = 500
+# a code asked for again within this long after it was issued is sent again instead of replaced
+VERIFICATION_CODE_REUSE_MINUTES = 5
+
+VERIFICATION_EMAIL_SUBJECT = "Your verification code"
+VERIFICATION_EMAIL_TEMPLATE = "emails/signup_verification.txt"
+
+
+class UserVerificationManager(models.Manager):
+    def resend_expired(self, batch_size: int = DEFAULT_RESEND_BATCH_SIZE) -> int:
+        """Give every expired verification of a not yet activated user a new code and email it,
+        all over one mail connection.
+
+        Returns how many emails were sent.
+        """
+        template = get_template(VERIFICATION_EMAIL_TEMPLATE)
+        expired = self.filter(
+            models.Q(expired_at__lt=django.utils.timezone.now()) | models.Q(expired_at__isnull=True),
+            user__is_active=False,
+        ).select_related("user")
+
+        sent = 0
+        last_id = 0
+        with get_connection() as connection:
+            while True:
+                verifications = list(expired.filter(id__gt=last_id).order_by("id")[:batch_size])
+                if not verifications:
+                    break
+                last_id = verifications[-1].id
+
+                # codes are stored before sending; a code whose email failed can be requested again
+                for verification in verifications:
+                    verification.set_new_verification_code()
+                    verification.set_expiration()
+                self.bulk_update(verifications, ["verification_code", "expired_at"])
+
+                messages = [
+                    EmailMessage(
+                        subject=VERIFICATION_EMAIL_SUBJECT,
+                        body=template.render({"user": verification.user, "user_verification": verification}),
+                        from_email=settings.EMAIL_HOST_USER,
+                        to=[verification.user.email],
+                    )
+                    for verification in verifications
+                ]
+                sent += connection.send_messages(messages) or 0
+        return sent
 
 
 class UserVerification(BaseModel):
     user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE)
     verification_code = models.CharField(max_length=VERIFICATION_CODE_LENGTH, null=True, blank=True)
-    expired_at = models.DateTimeField(null=True, blank=True)
+    expired_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = UserVerificationManager()
 
     def __str__(self) -> str:
         return self.user.username
@@ -35,11 +85,12 @@ class UserVerification(BaseModel):
         return django.utils.timezone.now() > self.expired_at
 
     def send_verification_code(self) -> None:
-        send_mail(
-            subject="Your verification code",
-            message=render_to_string("emails/signup_verification.txt", {"user": self.user, "user_verification": self}),
+        # queued in the outbox, so the SMTP round trip happens in the outbox worker instead of the request
+        EmailOutbox.objects.enqueue(
+            subject=VERIFICATION_EMAIL_SUBJECT,
+            body=render_to_string(VERIFICATION_EMAIL_TEMPLATE, {"user": self.user, "user_verification": self}),
             from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[self.user.email],
+            to_email=self.user.email,
         )
 
     def send_new_verification_code(self) -> None:
@@ -47,3 +98,16 @@ class UserVerification(BaseModel):
         self.set_expiration()
         self.save()
         self.send_verification_code()
+
+    def can_reuse_code(self, reuse_minutes: int = VERIFICATION_CODE_REUSE_MINUTES) -> bool:
+        if not self.verification_code or self.expired_at is None or self.is_expired():
+            return False
+        issued_at = self.expired_at - timedelta(minutes=DEFAULT_VERIFICATION_EXPIRATION_MINUTES)
+        return django.utils.timezone.now() < issued_at + timedelta(minutes=reuse_minutes)
+
+    def resend_verification_code(self) -> None:
+        """Send the current code again if it was issued moments ago, otherwise send a new one."""
+        if self.can_reuse_code():
+            self.send_verification_code()
+        else:
+            self.send_new_verification_code()
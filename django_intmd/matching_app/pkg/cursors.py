@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+# UTC timestamp with microseconds and the row id, e.g. `20250101T093000123456_42`; safe to put in a URL as is
+CURSOR_TIME_FORMAT = "%Y%m%dT%H%M%S%f"
+
+
+def encode_cursor(cursor: tuple[datetime, int]) -> str:
+    created_at, row_id = cursor
+    return f"{created_at.astimezone(timezone.utc).strftime(CURSOR_TIME_FORMAT)}_{row_id}"
+
+
+def decode_cursor(encoded_cursor: str) -> Optional[tuple[datetime, int]]:
+    created_at, _, row_id = encoded_cursor.partition("_")
+    try:
+        return datetime.strptime(created_at, CURSOR_TIME_FORMAT).replace(tzinfo=timezone.utc), int(row_id)
+    except ValueError:
+        return None
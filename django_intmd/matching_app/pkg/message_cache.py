@@ -0,0 +1,124 @@
+from typing import Optional
+
+import redis
+import structlog
+from django.conf import settings
+
+from matching_app.pkg.redis import get_redis_client
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_MESSAGE_CACHE_SIZE = 50
+INVALIDATE_BATCH_SIZE = 1000
+
+
+class RoomMessageCache:
+    """Ring buffer of the most recent encoded messages of each room, kept in Redis.
+
+    Messages are appended after they are committed, and every append bumps a per-room version
+    so that a fill computed from a database read which raced with a new message is discarded.
+    At worst a racing fill duplicates a message, which `get` drops; it never hides one.
+    Redis errors are logged and reported as cache misses.
+    """
+
+    def __init__(self, size: int = DEFAULT_MESSAGE_CACHE_SIZE, ttl: Optional[int] = None):
+        self.size = size
+        self.ttl = ttl if ttl is not None else settings.CHAT_HISTORY_CACHE_TTL
+
+    @staticmethod
+    def messages_key(room_id: int) -> str:
+        return f"chat:room:{room_id}:messages"
+
+    @staticmethod
+    def version_key(room_id: int) -> str:
+        return f"chat:room:{room_id}:version"
+
+    def get(self, room_id: int) -> Optional[list[str]]:
+        try:
+            encoded_messages = get_redis_client().lrange(self.messages_key(room_id), 0, -1)
+        except redis.RedisError as ex:
+            logger.warning("Failed to read message cache", room_id=room_id, error=ex)
+            return None
+        if not encoded_messages:
+            return None
+        # a message encodes to the same bytes every time, so exact duplicates are the same message
+        return [encoded_message.decode("utf-8") for encoded_message in dict.fromkeys(encoded_messages)]
+
+    def get_version(self, room_id: int) -> Optional[int]:
+        try:
+            version = get_redis_client().get(self.version_key(room_id))
+        except redis.RedisError as ex:
+            logger.warning("Failed to read message cache version", room_id=room_id, error=ex)
+            return None
+        return int(version or 0)
+
+    def fill(self, room_id: int, encoded_messages: list[str], version: Optional[int]) -> bool:
+        """Replace the buffer unless a message was appended since `version` was read."""
+        if version is None or not encoded_messages:
+            return False
+
+        messages_key = self.messages_key(room_id)
+        version_key = self.version_key(room_id)
+        newest_messages = encoded_messages[-self.size :]  # noqa: E203
+        try:
+            with get_redis_client().pipeline() as pipe:
+                pipe.watch(version_key)
+                if int(pipe.get(version_key) or 0) != version:
+                    return False
+                pipe.multi()
+                pipe.delete(messages_key)
+                pipe.rpush(messages_key, *newest_messages)
+                pipe.expire(messages_key, self.ttl)
+                pipe.execute()
+        except redis.WatchError:
+            return False
+        except redis.RedisError as ex:
+            logger.warning("Failed to fill message cache", room_id=room_id, error=ex)
+            return False
+        return True
+
+    def append(self, room_id: int, encoded_message: str) -> None:
+        self.append_many([(room_id, encoded_message)])
+
+    def append_many(self, room_messages: list[tuple[int, str]]) -> None:
+        """Append `(room_id, encoded_message)` pairs in order, in a single round trip."""
+        try:
+            with get_redis_client().pipeline() as pipe:
+                for room_id, encoded_message in room_messages:
+                    messages_key = self.messages_key(room_id)
+                    version_key = self.version_key(room_id)
+                    pipe.incr(version_key)
+                    pipe.expire(version_key, self.ttl)
+                    # RPUSHX only extends a buffer that is already there; a missing one is rebuilt by the next fill
+                    pipe.rpushx(messages_key, encoded_message)
+                    pipe.ltrim(messages_key, -self.size, -1)
+                    pipe.expire(messages_key, self.ttl)
+                pipe.execute()
+        except redis.RedisError as ex:
+            logger.warning(
+                "Failed to append to message cache", room_ids=[room_id for room_id, _ in room_messages], error=ex
+            )
+
+    def invalidate(self, room_id: int) -> None:
+        try:
+            get_redis_client().delete(self.messages_key(room_id), self.version_key(room_id))
+        except redis.RedisError as ex:
+            logger.warning("Failed to invalidate message cache", room_id=room_id, error=ex)
+
+    def invalidate_all(self) -> int:
+        """Drop the buffers and versions of every room, e.g. after messages were moved between rooms.
+
+        Returns how many keys were deleted. Redis errors are raised, since a stale history would otherwise be served.
+        """
+        client = get_redis_client()
+        deleted = 0
+        for pattern in (self.messages_key("*"), self.version_key("*")):
+            keys = []
+            for key in client.scan_iter(match=pattern, count=INVALIDATE_BATCH_SIZE):
+                keys.append(key)
+                if len(keys) >= INVALIDATE_BATCH_SIZE:
+                    deleted += client.delete(*keys)
+                    keys = []
+            if keys:
+                deleted += client.delete(*keys)
+        return deleted
@@ -0,0 +1,62 @@
+import math
+import time
+from typing import Callable
+
+import redis
+import structlog
+from django.core.cache import cache
+from django.http import HttpRequest
+
+logger = structlog.get_logger(__name__)
+
+MICROSECONDS = 1_000_000
+
+
+def get_client_ip(request: HttpRequest) -> str:
+    # nginx passes the client address in X-Real-IP; without it the peer is the client
+    return request.META.get("HTTP_X_REAL_IP") or request.META.get("REMOTE_ADDR", "")
+
+
+class TokenBucketRateLimiter:
+    """A token bucket per identity, kept in the default cache so that every worker shares it.
+
+    Stored as the time at which the bucket is full again (GCRA), which a single atomic `incr`
+    can advance. `capacity` requests may burst, then one more each `refill_seconds`.
+    Cache errors are logged and let the request through.
+    """
+
+    def __init__(self, scope: str, capacity: int, refill_seconds: float, clock: Callable[[], float] = time.time):
+        self.scope = scope
+        self.capacity = capacity
+        self.interval = int(refill_seconds * MICROSECONDS)
+        self.clock = clock
+        self.timeout = math.ceil(capacity * refill_seconds) + 1
+
+    def key(self, identity: str) -> str:
+        return f"ratelimit:{self.scope}:{identity}"
+
+    def allow(self, identity: str) -> bool:
+        key = self.key(identity)
+        now = int(self.clock() * MICROSECONDS)
+        try:
+            if cache.add(key, now + self.interval, timeout=self.timeout):
+                return True
+            try:
+                full_at = cache.incr(key, self.interval)
+            except ValueError:
+                # expired between add and incr, so the bucket is full
+                cache.set(key, now + self.interval, timeout=self.timeout)
+                return True
+            if full_at - self.interval < now:
+                # the bucket refilled completely while idle; restart it from now
+                cache.set(key, now + self.interval, timeout=self.timeout)
+                return True
+            if full_at - now <= self.capacity * self.interval:
+                cache.touch(key, timeout=self.timeout)
+                return True
+            # give back the token this rejected request took
+            cache.decr(key, self.interval)
+            return False
+        except redis.RedisError as ex:
+            logger.warning("Failed to check rate limit", scope=self.scope, error=ex)
+            return True
@@ -0,0 +1,44 @@
+import heapq
+from dataclasses import dataclass
+
+# weights of the signals that make up a candidate's score
+CO_LIKER_WEIGHT = 1.0
+SAME_ADDRESS_WEIGHT = 2.0
+SAME_OCCUPATION_WEIGHT = 1.0
+AGE_WEIGHT = 2.0
+# candidates this many years apart or more get no age score
+AGE_SCORE_RANGE = 10
+
+
+@dataclass(frozen=True)
+class ProfileFeatures:
+    user_id: int
+    age: int
+    address: str
+    occupation: str
+
+
+def score_candidate(profile: ProfileFeatures, candidate: ProfileFeatures, co_likers: int) -> float:
+    """Score a candidate for `profile`; `co_likers` counts the users who liked someone `profile` liked and the candidate."""
+    score = CO_LIKER_WEIGHT * co_likers
+    if profile.address and profile.address == candidate.address:
+        score += SAME_ADDRESS_WEIGHT
+    if profile.occupation and profile.occupation == candidate.occupation:
+        score += SAME_OCCUPATION_WEIGHT
+    score += AGE_WEIGHT * max(0, AGE_SCORE_RANGE - abs(profile.age - candidate.age)) / AGE_SCORE_RANGE
+    return score
+
+
+def top_candidates(
+    profile: ProfileFeatures,
+    candidates: list[ProfileFeatures],
+    co_likers: dict[int, int],
+    top_k: int,
+) -> list[tuple[int, float]]:
+    """Return up to `top_k` `(candidate user id, score)` pairs, best first, ties broken by user id."""
+    scored = (
+        (score_candidate(profile, candidate, co_likers.get(candidate.user_id, 0)), candidate)
+        for candidate in candidates
+    )
+    best = heapq.nsmallest(top_k, scored, key=lambda item: (-item[0], item[1].user_id))
+    return [(candidate.user_id, score) for score, candidate in best]
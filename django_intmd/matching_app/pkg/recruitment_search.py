@@ -0,0 +1,151 @@
+import math
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import models
+from django.utils.module_loading import import_string
+
+# indexed together by the FULLTEXT index and the inverted index
+SEARCH_FIELDS = ("title", "content")
+INDEX_BUILD_CHUNK_SIZE = 2000
+# matched ids are checked against the caller's filters this many at a time
+FILTER_CHUNK_SIZE = 500
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class MatchAgainst(models.Func):
+    """MySQL `MATCH (columns) AGAINST (keywords IN NATURAL LANGUAGE MODE)`, the relevance of each row."""
+
+    template = "MATCH (%(expressions)s) AGAINST (%%s IN NATURAL LANGUAGE MODE)"
+    output_field = models.FloatField()
+
+    def __init__(self, *expressions, keywords: str):
+        super().__init__(*expressions)
+        self.keywords = keywords
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        return sql, (*params, self.keywords)
+
+
+class RecruitmentSearchBackend(ABC):
+    @abstractmethod
+    def search(self, recruitments: models.QuerySet, keywords: str, offset: int, limit: int) -> list:
+        """Return `limit` rows of `recruitments` matching `keywords` from `offset`, most relevant first."""
+
+    def index(self, recruitment) -> None:
+        pass
+
+    def remove(self, recruitment_id: int) -> None:
+        pass
+
+
+class FullTextSearchBackend(RecruitmentSearchBackend):
+    """Ranks rows with the MySQL FULLTEXT index on the title and content; the database keeps the index up to date."""
+
+    def search(self, recruitments: models.QuerySet, keywords: str, offset: int, limit: int) -> list:
+        relevance = MatchAgainst(*SEARCH_FIELDS, keywords=keywords)
+        end = offset + limit
+        return list(
+            recruitments.annotate(relevance=relevance).filter(relevance__gt=0).order_by("-relevance", "-id")[offset:end]
+        )
+
+
+class InvertedIndexSearchBackend(RecruitmentSearchBackend):
+    """An inverted index held in process memory, ranked by TF-IDF; for tests and SQLite.
+
+    Built from the table on the first search and kept up to date by the model signals, so rows
+    written without signals (bulk_create, update) after that are not indexed until `reset`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.postings: dict[str, dict[int, int]] = {}
+            self.documents: dict[int, Counter] = {}
+            self.is_built = False
+
+    def build(self, model: type[models.Model]) -> None:
+        with self.lock:
+            if self.is_built:
+                return
+            rows = model._default_manager.values_list("id", *SEARCH_FIELDS).iterator(chunk_size=INDEX_BUILD_CHUNK_SIZE)
+            for recruitment_id, *texts in rows:
+                self.add_document(recruitment_id, texts)
+            self.is_built = True
+
+    def add_document(self, recruitment_id: int, texts: list[str]) -> None:
+        self.remove_document(recruitment_id)
+        term_counts = Counter(token for text in texts for token in tokenize(text))
+        self.documents[recruitment_id] = term_counts
+        for token, count in term_counts.items():
+            self.postings.setdefault(token, {})[recruitment_id] = count
+
+    def remove_document(self, recruitment_id: int) -> None:
+        for token in self.documents.pop(recruitment_id, ()):
+            self.postings[token].pop(recruitment_id, None)
+            if not self.postings[token]:
+                del self.postings[token]
+
+    def index(self, recruitment) -> None:
+        with self.lock:
+            if self.is_built:
+                self.add_document(recruitment.id, [getattr(recruitment, field) for field in SEARCH_FIELDS])
+
+    def remove(self, recruitment_id: int) -> None:
+        with self.lock:
+            if self.is_built:
+                self.remove_document(recruitment_id)
+
+    def rank(self, keywords: str) -> list[int]:
+        scores: Counter = Counter()
+        with self.lock:
+            for token in set(tokenize(keywords)):
+                postings = self.postings.get(token, {})
+                if not postings:
+                    continue
+                idf = math.log(1 + len(self.documents) / len(postings))
+                for recruitment_id, count in postings.items():
+                    scores[recruitment_id] += count * idf
+        return sorted(scores, key=lambda recruitment_id: (-scores[recruitment_id], -recruitment_id))
+
+    def search(self, recruitments: models.QuerySet, keywords: str, offset: int, limit: int) -> list:
+        self.build(recruitments.model)
+        ranked_ids = self.rank(keywords)
+
+        # walk the ranking in chunks and keep the ids that also pass the caller's filters
+        page_ids: list[int] = []
+        skipped = 0
+        for start in range(0, len(ranked_ids), FILTER_CHUNK_SIZE):
+            end = start + FILTER_CHUNK_SIZE
+            chunk = ranked_ids[start:end]
+            allowed_ids = set(recruitments.filter(id__in=chunk).values_list("id", flat=True))
+            for recruitment_id in chunk:
+                if recruitment_id not in allowed_ids:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                page_ids.append(recruitment_id)
+            if len(page_ids) >= limit:
+                break
+
+        page = recruitments.in_bulk(page_ids[:limit])
+        return [page[recruitment_id] for recruitment_id in page_ids[:limit]]
+
+
+@lru_cache()
+def get_recruitment_search_backend() -> RecruitmentSearchBackend:
+    return import_string(settings.RECRUITMENT_SEARCH_BACKEND)()
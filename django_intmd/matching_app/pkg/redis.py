@@ -0,0 +1,11 @@
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+@lru_cache()
+def get_redis_client() -> redis.Redis:
+    client_class = import_string(settings.REDIS_CLIENT_CLASS)
+    return client_class.from_url(settings.REDIS_URL)
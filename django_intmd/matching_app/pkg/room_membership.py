@@ -0,0 +1,74 @@
+import json
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import redis
+import structlog
+from django.conf import settings
+
+from matching_app.pkg.exceptions import NoOppositeUserError
+from matching_app.pkg.redis import get_redis_client
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class RoomMemberProfile:
+    id: int
+    username: str
+    icon_url: str
+
+
+@dataclass(frozen=True)
+class RoomMembership:
+    room_id: int
+    members: tuple[RoomMemberProfile, ...]
+
+    def is_member(self, user_id: int) -> bool:
+        return any(member.id == user_id for member in self.members)
+
+    def get_opposite_member(self, user_id: int) -> RoomMemberProfile:
+        for member in self.members:
+            if member.id != user_id:
+                return member
+        logger.error("no opposite member", room_id=self.room_id)
+        raise NoOppositeUserError("no opposite member")
+
+
+class RoomMembershipCache:
+    """Member ids and display data of each room, kept in Redis.
+
+    Entries are deleted whenever a member, the room or a member's profile changes.
+    Redis errors are logged and reported as cache misses.
+    """
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else settings.CHAT_MEMBERSHIP_CACHE_TTL
+
+    @staticmethod
+    def key(room_id: int) -> str:
+        return f"chat:room:{room_id}:members"
+
+    def get(self, room_id: int) -> Optional[RoomMembership]:
+        try:
+            encoded_members = get_redis_client().get(self.key(room_id))
+        except redis.RedisError as ex:
+            logger.warning("Failed to read membership cache", room_id=room_id, error=ex)
+            return None
+        if encoded_members is None:
+            return None
+        members = tuple(RoomMemberProfile(**member) for member in json.loads(encoded_members))
+        return RoomMembership(room_id=room_id, members=members)
+
+    def set(self, membership: RoomMembership) -> None:
+        encoded_members = json.dumps([asdict(member) for member in membership.members])
+        try:
+            get_redis_client().set(self.key(membership.room_id), encoded_members, ex=self.ttl)
+        except redis.RedisError as ex:
+            logger.warning("Failed to fill membership cache", room_id=membership.room_id, error=ex)
+
+    def invalidate(self, room_id: int) -> None:
+        try:
+            get_redis_client().delete(self.key(room_id))
+        except redis.RedisError as ex:
+            logger.error("Failed to invalidate membership cache", room_id=room_id, error=ex)
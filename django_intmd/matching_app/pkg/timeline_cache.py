@@ -0,0 +1,85 @@
+import hashlib
+import json
+import time
+from typing import Any, Optional
+
+import redis
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+
+logger = structlog.get_logger(__name__)
+
+GENERATION_KEY = "recruitment:timeline:generation"
+HITS_KEY = "recruitment:timeline:hits"
+MISSES_KEY = "recruitment:timeline:misses"
+
+
+class RecruitmentTimelineCache:
+    """Timeline pages kept in the default cache, keyed by the filter, the page cursor and a generation.
+
+    Every recruitment write bumps the generation, which orphans all cached pages at once; they then expire by TTL.
+    The generation is read before the page is built, so a page that raced with a write is stored under the old one.
+    Cache errors are logged and reported as misses.
+    """
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else settings.RECRUITMENT_TIMELINE_CACHE_TTL
+
+    def get_generation(self) -> int:
+        # seeded with the clock, so a generation lost to eviction never comes back to an old value
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        return cache.get(GENERATION_KEY)
+
+    def bump_generation(self) -> None:
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        except redis.RedisError as ex:
+            logger.error("Failed to bump timeline cache generation", error=ex)
+
+    @staticmethod
+    def key(generation: int, kind: str, page_filter: dict) -> str:
+        digest = hashlib.sha256(json.dumps(page_filter, sort_keys=True, default=str).encode()).hexdigest()
+        return f"recruitment:timeline:{generation}:{kind}:{digest}"
+
+    def get_key(self, kind: str, page_filter: dict) -> Optional[str]:
+        try:
+            return self.key(self.get_generation(), kind, page_filter)
+        except redis.RedisError as ex:
+            logger.warning("Failed to read timeline cache generation", error=ex)
+            return None
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        if key is None:
+            return None
+        try:
+            page = cache.get(key)
+        except redis.RedisError as ex:
+            logger.warning("Failed to read timeline cache", key=key, error=ex)
+            page = None
+        self.count(HITS_KEY if page is not None else MISSES_KEY)
+        return page
+
+    def set(self, key: Optional[str], page: Any) -> None:
+        if key is None:
+            return
+        try:
+            cache.set(key, page, timeout=self.ttl)
+        except redis.RedisError as ex:
+            logger.warning("Failed to fill timeline cache", key=key, error=ex)
+
+    @staticmethod
+    def count(counter_key: str) -> None:
+        try:
+            cache.incr(counter_key)
+        except ValueError:
+            cache.add(counter_key, 1, timeout=None)
+        except redis.RedisError as ex:
+            logger.warning("Failed to count timeline cache lookup", counter=counter_key, error=ex)
+
+    @staticmethod
+    def get_stats() -> dict[str, int]:
+        counters = cache.get_many([HITS_KEY, MISSES_KEY])
+        return {"hits": counters.get(HITS_KEY, 0), "misses": counters.get(MISSES_KEY, 0)}
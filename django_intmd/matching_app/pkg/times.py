@@ -1,5 +1,8 @@
 from datetime import date, datetime, timedelta
-from typing import Any
+from typing import Any, Optional
+
+from django.db.models import Case, ExpressionWrapper, IntegerField, Q, Value, When
+from django.db.models.functions import ExtractYear
 
 MIN_BIRTH_YEAR = 1920
 MAX_BIRTH_YEAR = datetime.now().year - 18
@@ -23,6 +26,35 @@ def get_age_from_date_of_birth(date_of_birth: Any) -> int:
     return age
 
 
+def years_before(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        # February 29th in a year that is not a leap year
+        return day.replace(year=day.year - years, day=28)
+
+
+def get_date_of_birth_range(
+    min_age: Optional[int], max_age: Optional[int], today: date
+) -> tuple[Optional[date], Optional[date]]:
+    """Turn an age range into `(born_after, born_on_or_before)` bounds on the date of birth; either may be None."""
+    born_on_or_before = years_before(today, min_age) if min_age else None
+    # someone is at most `max_age` until the day before turning `max_age + 1`
+    born_after = years_before(today, max_age + 1) if max_age else None
+    return born_after, born_on_or_before
+
+
+def age_expression(date_of_birth_field: str, today: date) -> ExpressionWrapper:
+    """Database expression for the age in years on `today` of whoever was born on `date_of_birth_field`."""
+    birthday_not_reached = Q(**{f"{date_of_birth_field}__month__gt": today.month}) | Q(
+        **{f"{date_of_birth_field}__month": today.month, f"{date_of_birth_field}__day__gt": today.day}
+    )
+    return ExpressionWrapper(
+        Value(today.year) - ExtractYear(date_of_birth_field) - Case(When(birthday_not_reached, then=1), default=0),
+        output_field=IntegerField(),
+    )
+
+
 def is_over_18_years_old(day_of_birth: datetime.date) -> bool:
     today = date.today()
     age = today.year - day_of_birth.year
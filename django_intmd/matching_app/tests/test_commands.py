@@ -0,0 +1,355 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from matching_app.models import (
+    EmailOutbox,
+    Match,
+    Message,
+    Room,
+    UserLike,
+    UserProfile,
+    UserRecommendation,
+    UserVerification,
+)
+from matching_app.pkg.message_cache import RoomMessageCache
+from matching_app.pkg.redis import get_redis_client
+
+
+class ReapEmptyRoomsCommandTests(TestCase):
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"reap_user{i}",
+                email=f"reap{i}@example.com",
+                password="ReapPass123",
+                date_of_birth="2000-01-01",
+            )
+            for i in range(4)
+        ]
+
+    def create_room(self, users: list, created_minutes_ago: int) -> Room:
+        room = Room.objects.get_or_create_room_with_members(users)
+        Room.objects.filter(pk=room.pk).update(created_at=timezone.now() - timedelta(minutes=created_minutes_ago))
+        return room
+
+    def test_deletes_only_old_empty_rooms(self):
+        old_empty_room = self.create_room(self.users[0:2], created_minutes_ago=120)
+        old_room_with_message = self.create_room(self.users[1:3], created_minutes_ago=120)
+        Message.objects.create(sender=self.users[1], room=old_room_with_message, content="hello")
+        new_empty_room = self.create_room(self.users[2:4], created_minutes_ago=0)
+
+        out = StringIO()
+        call_command("reap_empty_rooms", "--older-than-minutes=60", "--batch-size=1", stdout=out)
+
+        self.assertFalse(Room.objects.filter(pk=old_empty_room.pk).exists())
+        self.assertTrue(Room.objects.filter(pk=old_room_with_message.pk).exists())
+        self.assertTrue(Room.objects.filter(pk=new_empty_room.pk).exists())
+        self.assertIn("Deleted 1 empty rooms", out.getvalue())
+
+
+class ClearMessageCacheCommandTests(TestCase):
+    def test_drops_cached_histories_of_every_room(self):
+        client = get_redis_client()
+        client.flushdb()
+        cache = RoomMessageCache(size=3, ttl=60)
+        for room_id in (1, 2):
+            cache.fill(room_id, ["m1"], cache.get_version(room_id))
+            cache.append(room_id, "m2")
+        client.set("unrelated", "kept")
+
+        out = StringIO()
+        call_command("clear_message_cache", stdout=out)
+
+        self.assertIsNone(cache.get(1))
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get_version(1), 0)
+        self.assertEqual(client.get("unrelated"), b"kept")
+        self.assertIn("Deleted 4 cached message keys", out.getvalue())
+
+
+class RebuildMatchesCommandTests(TestCase):
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"match_user{i}",
+                email=f"match{i}@example.com",
+                password="MatchPass123",
+                date_of_birth="2000-01-01",
+            )
+            for i in range(3)
+        ]
+
+    def test_rebuilds_matches_from_mutual_likes(self):
+        UserLike.objects.create(sender=self.users[0], receiver=self.users[1])
+        UserLike.objects.create(sender=self.users[1], receiver=self.users[0])
+        UserLike.objects.create(sender=self.users[0], receiver=self.users[2])
+        stale_match = Match.objects.create(user=self.users[2], matched_user=self.users[0])
+
+        out = StringIO()
+        call_command("rebuild_matches", "--batch-size=1", stdout=out)
+
+        self.assertTrue(Match.objects.is_matched(self.users[0].id, self.users[1].id))
+        self.assertTrue(Match.objects.is_matched(self.users[1].id, self.users[0].id))
+        self.assertFalse(Match.objects.filter(pk=stale_match.pk).exists())
+        self.assertEqual(Match.objects.count(), 2)
+        self.assertIn("deleted 1 stale matches", out.getvalue())
+
+
+class ReconcileLikeCountsCommandTests(TestCase):
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"count_user{i}",
+                email=f"count{i}@example.com",
+                password="CountPass123",
+                date_of_birth="2000-01-01",
+            )
+            for i in range(3)
+        ]
+
+    def test_recomputes_drifted_counts(self):
+        UserLike.objects.create(sender=self.users[0], receiver=self.users[1])
+        UserLike.objects.create(sender=self.users[2], receiver=self.users[1])
+        UserProfile.objects.filter(user=self.users[2]).update(likes_received_count=5)
+
+        out = StringIO()
+        call_command("reconcile_like_counts", "--batch-size=2", stdout=out)
+
+        counts = dict(UserProfile.objects.values_list("user_id", "likes_received_count").filter(user__in=self.users))
+        self.assertEqual(counts, {self.users[0].id: 0, self.users[1].id: 2, self.users[2].id: 0})
+        self.assertEqual(UserProfile.objects.get(user=self.users[0]).likes_sent_count, 1)
+        self.assertIn("Updated like counts of 3 profiles", out.getvalue())
+
+    def test_counts_in_the_update_and_skips_profiles_in_step(self):
+        UserLike.objects.create(sender=self.users[0], receiver=self.users[1])
+        UserProfile.objects.reconcile_like_counts()
+        UserProfile.objects.filter(user=self.users[1]).update(likes_received_count=7)
+
+        # the batch's ids, one UPDATE that recounts only the drifted profiles, and the empty read ending the walk
+        with self.assertNumQueries(3):
+            updated_profiles = UserProfile.objects.reconcile_like_counts(batch_size=10)
+
+        self.assertEqual(updated_profiles, 1)
+        self.assertEqual(UserProfile.objects.get(user=self.users[1]).likes_received_count, 1)
+
+
+class RescoreRecommendationsCommandTests(TestCase):
+    def setUp(self):
+        self.users = []
+        for i in range(5):
+            user = get_user_model().objects.create_user(
+                username=f"rank_user{i}",
+                email=f"rank{i}@example.com",
+                password="RankPass123",
+                date_of_birth="2000-01-01",
+            )
+            self.users.append(user)
+
+    def rescore(self) -> str:
+        out = StringIO()
+        call_command("rescore_recommendations", "--batch-size=2", stdout=out)
+        return out.getvalue()
+
+    def recommended_ids(self, user) -> list[int]:
+        return list(
+            UserRecommendation.objects.filter(user=user).order_by("rank").values_list("candidate_id", flat=True)
+        )
+
+    def test_ranks_candidates_liked_by_co_likers_first(self):
+        viewer, liked, co_liker, co_liked, _ = self.users
+        UserLike.objects.create(sender=viewer, receiver=liked)
+        UserLike.objects.create(sender=co_liker, receiver=liked)
+        UserLike.objects.create(sender=co_liker, receiver=co_liked)
+
+        self.rescore()
+
+        recommended_ids = self.recommended_ids(viewer)
+        self.assertEqual(recommended_ids[0], co_liked.id)
+        self.assertNotIn(liked.id, recommended_ids)
+        self.assertNotIn(viewer.id, recommended_ids)
+
+    def test_recommends_only_active_users(self):
+        viewer, inactive, *_ = self.users
+        inactive.is_active = False
+        inactive.save()
+
+        self.rescore()
+
+        recommended_ids = self.recommended_ids(viewer)
+        self.assertNotIn(inactive.id, recommended_ids)
+        self.assertEqual(len(recommended_ids), 3)
+
+    def test_workers_fork_without_the_parent_querying(self):
+        parent_query_counts = []
+
+        class RecordingExecutor(ProcessPoolExecutor):
+            def map(self, *args, **kwargs):
+                # queries made here run in the parent while workers fork, on a connection they would inherit
+                with CaptureQueriesContext(connection) as queries:
+                    results = list(super().map(*args, **kwargs))
+                parent_query_counts.append(len(queries))
+                return results
+
+        out = StringIO()
+        with mock.patch(
+            "matching_app.management.commands.rescore_recommendations.ProcessPoolExecutor", RecordingExecutor
+        ):
+            call_command("rescore_recommendations", "--batch-size=2", "--workers=2", stdout=out)
+
+        self.assertEqual(parent_query_counts, [0])
+        self.assertIn("Rescored 5 users", out.getvalue())
+        self.assertEqual(get_user_model().objects.count(), 5)
+
+    def test_rescores_only_stale_users(self):
+        self.assertIn("Rescored 5 users", self.rescore())
+        self.assertIn("Rescored 0 users", self.rescore())
+
+        profile = self.users[0].userprofile
+        profile.occupation = "engineer"
+        profile.save()
+
+        self.assertIn("Rescored 1 users", self.rescore())
+
+
+class SendOutboxEmailsCommandTests(TestCase):
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"outbox_user{i}",
+                email=f"outbox{i}@example.com",
+                password="OutboxPass123",
+                date_of_birth="2000-01-01",
+            )
+            for i in range(3)
+        ]
+
+    def test_signup_queues_verification_email_without_sending(self):
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(
+            sorted(EmailOutbox.objects.filter(sent_at__isnull=True).values_list("to_email", flat=True)),
+            ["outbox0@example.com", "outbox1@example.com", "outbox2@example.com"],
+        )
+
+    def test_sends_due_emails_in_batches(self):
+        out = StringIO()
+        call_command("send_outbox_emails", "--batch-size=2", stdout=out)
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [user.email for user in self.users])
+        self.assertIn(str(self.users[0].userverification.verification_code), mail.outbox[0].body + mail.outbox[1].body)
+        self.assertFalse(EmailOutbox.objects.filter(sent_at__isnull=True).exists())
+        self.assertIn("Sent 3 emails, 0 failed", out.getvalue())
+
+    @override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_HOST="127.0.0.1",
+        EMAIL_PORT=1,
+        EMAIL_USE_TLS=False,
+        EMAIL_TIMEOUT=1,
+    )
+    def test_failed_emails_are_retried_with_backoff(self):
+        call_command("send_outbox_emails", stdout=StringIO())
+
+        email = EmailOutbox.objects.filter(to_email=self.users[0].email).get()
+        self.assertIsNone(email.sent_at)
+        self.assertEqual(email.attempts, 1)
+        self.assertNotEqual(email.last_error, "")
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        out = StringIO()
+        call_command("send_outbox_emails", stdout=out)
+        self.assertIn("Sent 0 emails, 0 failed", out.getvalue())
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        with self.settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"):
+            call_command("send_outbox_emails", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(EmailOutbox.objects.filter(sent_at__isnull=True).exists())
+
+
+class ResendVerificationCodesCommandTests(TestCase):
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"resend_user{i}",
+                email=f"resend{i}@example.com",
+                password="ResendPass123",
+                date_of_birth="2000-01-01",
+                is_active=False,
+            )
+            for i in range(3)
+        ]
+
+    def test_resends_only_expired_codes(self):
+        UserVerification.objects.filter(user__in=self.users[:2]).update(
+            verification_code="111111", expired_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        out = StringIO()
+        call_command("resend_verification_codes", "--batch-size=1", stdout=out)
+
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox), ["resend0@example.com", "resend1@example.com"]
+        )
+        for verification in UserVerification.objects.filter(user__in=self.users[:2]):
+            self.assertNotEqual(verification.verification_code, "111111")
+            self.assertFalse(verification.is_expired())
+            self.assertTrue(any(verification.verification_code in message.body for message in mail.outbox))
+        self.assertIn("Resent 2 verification codes", out.getvalue())
+
+    def test_skips_active_users(self):
+        active_user = get_user_model().objects.create_user(
+            username="resend_active",
+            email="resend_active@example.com",
+            password="ResendPass123",
+            date_of_birth="2000-01-01",
+        )
+        UserVerification.objects.filter(user=active_user).update(
+            verification_code="111111", expired_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        out = StringIO()
+        call_command("resend_verification_codes", stdout=out)
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(UserVerification.objects.get(user=active_user).verification_code, "111111")
+        self.assertIn("Resent 0 verification codes", out.getvalue())
+
+
+class PurgeUnverifiedUsersCommandTests(TestCase):
+    def create_user(self, name: str, is_active: bool, expired_hours_ago: int):
+        user = get_user_model().objects.create_user(
+            username=name,
+            email=f"{name}@example.com",
+            password="PurgePass123",
+            date_of_birth="2000-01-01",
+            is_active=is_active,
+        )
+        UserVerification.objects.filter(user=user).update(
+            expired_at=timezone.now() - timedelta(hours=expired_hours_ago)
+        )
+        return user
+
+    def test_purges_only_stale_unverified_users(self):
+        stale_users = [self.create_user(f"stale{i}", is_active=False, expired_hours_ago=48) for i in range(3)]
+        recent_user = self.create_user("recent", is_active=False, expired_hours_ago=1)
+        active_user = self.create_user("active", is_active=True, expired_hours_ago=48)
+
+        out = StringIO()
+        call_command("purge_unverified_users", "--expired-for-hours=24", "--batch-size=2", stdout=out)
+
+        self.assertFalse(get_user_model().objects.filter(id__in=[user.id for user in stale_users]).exists())
+        self.assertFalse(UserProfile.objects.filter(user_id__in=[user.id for user in stale_users]).exists())
+        self.assertTrue(UserVerification.objects.filter(user=recent_user).exists())
+        self.assertTrue(get_user_model().objects.filter(id=active_user.id).exists())
+        self.assertTrue(UserVerification.objects.filter(user=active_user).exists())
+        self.assertIn("Deleted 3 unverified users", out.getvalue())
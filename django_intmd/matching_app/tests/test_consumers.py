@@ -1,13 +1,31 @@
+import json
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
 from channels.testing import WebsocketCommunicator
 from django.contrib.auth import get_user_model
-from django.test import TransactionTestCase
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, TransactionTestCase, override_settings
 
-from matching_app.channels.chat_consumer import ChatConsumer
+from matching_app.channels.chat_consumer import (
+    CHAT_HISTORY_PAGE_SIZE,
+    ChatConsumer,
+    encode_history_frames,
+    encode_message,
+    history_cache,
+    message_write_buffer,
+)
+from matching_app.channels.message_writer import MESSAGE_DEAD_LETTER_KEY, MessageWriteBuffer
+from matching_app.models.message import Message
 from matching_app.models.room import Room
+from matching_app.pkg.message_cache import RoomMessageCache
+from matching_app.pkg.redis import get_redis_client
 
 
 class ChatConsumerTests(TransactionTestCase):
     def setUp(self):
+        get_redis_client().flushdb()
         self.user1 = get_user_model().objects.create_user(
             username="chat_user1",
             email="chat1@example.com",
@@ -44,8 +62,6 @@ class ChatConsumerTests(TransactionTestCase):
 
         message_data = {
             "type": "chat.message",
-            "sender_id": self.user1.id,
-            "room_id": self.room.id,
             "message": "New test message",
         }
         await communicator.send_json_to(message_data)
@@ -53,3 +69,305 @@ class ChatConsumerTests(TransactionTestCase):
 
         self.assertEqual(response["message"], "New test message")
         self.assertEqual(response["sender"], self.user1.username)
+
+    async def test_connect_rejects_non_member(self):
+        other_user = await database_sync_to_async(get_user_model().objects.create_user)(
+            username="chat_user3",
+            email="chat3@example.com",
+            password="Chat3Pass123",
+            date_of_birth="2000-01-01",
+        )
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(),
+            f"/ws/chat/{self.room.id}/",
+        )
+        communicator.scope["user"] = other_user
+        communicator.scope["url_route"] = {"kwargs": {"room_id": self.room.id}}
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_connect_rejects_anonymous_user(self):
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(),
+            f"/ws/chat/{self.room.id}/",
+        )
+        communicator.scope["user"] = AnonymousUser()
+        communicator.scope["url_route"] = {"kwargs": {"room_id": self.room.id}}
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_receive_message_uses_scope_user_as_sender(self):
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(),
+            f"/ws/chat/{self.room.id}/",
+        )
+        communicator.scope["user"] = self.user1
+        communicator.scope["url_route"] = {"kwargs": {"room_id": self.room.id}}
+        await communicator.connect()
+
+        await communicator.send_json_to({"sender_id": self.user2.id, "message": "spoofed sender"})
+        response = await communicator.receive_json_from()
+        await communicator.disconnect()
+
+        self.assertEqual(response["sender"], self.user1.username)
+        self.assertTrue(await Message.objects.filter(sender=self.user1, content="spoofed sender").aexists())
+
+    def test_create_message_costs_insert_and_room_summary_update(self):
+        consumer = ChatConsumer()
+        consumer.room_id = self.room.id
+        consumer.user = self.user1
+
+        with self.assertNumQueries(2):
+            message = async_to_sync(consumer.create_message)("one query")
+
+        self.assertEqual(message.room_id, self.room.id)
+        self.assertEqual(message.sender_id, self.user1.id)
+
+    def test_disconnect_from_room_with_history_makes_no_query(self):
+        consumer = ChatConsumer()
+        consumer.channel_layer = get_channel_layer()
+        consumer.channel_name = "test.channel"
+        consumer.room_id = self.room.id
+        consumer.room_group_name = f"chat_{self.room.id}"
+        consumer.joined = True
+        consumer.had_history = True
+        consumer.saw_message = False
+
+        with self.assertNumQueries(0):
+            async_to_sync(consumer.disconnect)(1000)
+
+    async def test_disconnect_after_room_was_deleted_does_not_fail(self):
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(),
+            f"/ws/chat/{self.room.id}/",
+        )
+        communicator.scope["user"] = self.user1
+        communicator.scope["url_route"] = {"kwargs": {"room_id": self.room.id}}
+        await communicator.connect()
+        await Room.objects.filter(pk=self.room.id).adelete()
+
+        await communicator.disconnect()
+
+        self.assertFalse(await Room.objects.filter(pk=self.room.id).aexists())
+
+    async def test_connect_sends_only_newest_history_page(self):
+        await Message.objects.abulk_create(
+            [
+                Message(sender=self.user1, room=self.room, content=f"message {i}")
+                for i in range(CHAT_HISTORY_PAGE_SIZE + 5)
+            ]
+        )
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(),
+            f"/ws/chat/{self.room.id}/",
+        )
+        communicator.scope["user"] = self.user1
+        communicator.scope["url_route"] = {"kwargs": {"room_id": self.room.id}}
+        await communicator.connect()
+
+        history = [await communicator.receive_json_from() for _ in range(CHAT_HISTORY_PAGE_SIZE)]
+        self.assertTrue(await communicator.receive_nothing())
+        self.assertEqual(history[0]["message"], "message 5")
+        self.assertEqual(history[-1]["message"], f"message {CHAT_HISTORY_PAGE_SIZE + 4}")
+
+        await communicator.send_json_to(
+            {
+                "type": "chat.load_older",
+                "before": {"created_at": history[0]["created_at"], "id": history[0]["id"]},
+            }
+        )
+        response = await communicator.receive_json_from()
+
+        self.assertEqual(response["type"], "chat.older_messages")
+        self.assertFalse(response["has_more"])
+        self.assertEqual([message["message"] for message in response["messages"]], [f"message {i}" for i in range(5)])
+        await communicator.disconnect()
+
+    async def test_connect_with_batch_history_sends_single_frame(self):
+        await Message.objects.abulk_create(
+            [Message(sender=self.user1, room=self.room, content=f"message {i}") for i in range(3)]
+        )
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(),
+            f"/ws/chat/{self.room.id}/?history=batch",
+        )
+        communicator.scope["user"] = self.user1
+        communicator.scope["url_route"] = {"kwargs": {"room_id": self.room.id}}
+        await communicator.connect()
+
+        response = await communicator.receive_json_from()
+
+        self.assertTrue(await communicator.receive_nothing())
+        self.assertEqual(response["type"], "chat.history")
+        self.assertFalse(response["has_more"])
+        self.assertEqual(
+            [message["message"] for message in response["messages"]], ["message 0", "message 1", "message 2"]
+        )
+        self.assertEqual(response["messages"][0]["sender"], self.user1.username)
+        await communicator.disconnect()
+
+    def test_encode_history_frames_caps_frame_size(self):
+        messages = [Message.objects.create(sender=self.user1, room=self.room, content="x" * 100) for _ in range(10)]
+
+        frames = encode_history_frames(
+            [encode_message(message) for message in messages], "chat.history", has_more=True, max_bytes=512
+        )
+
+        self.assertGreater(len(frames), 1)
+        decoded_messages = []
+        for frame in frames:
+            self.assertLessEqual(len(frame.encode("utf-8")), 512)
+            decoded_frame = json.loads(frame)
+            self.assertTrue(decoded_frame["has_more"])
+            decoded_messages.extend(decoded_frame["messages"])
+        self.assertEqual([message["id"] for message in decoded_messages], [message.id for message in messages])
+
+    async def test_history_is_served_from_cache_after_first_connect(self):
+        await Message.objects.acreate(sender=self.user1, room=self.room, content="cached message")
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(),
+            f"/ws/chat/{self.room.id}/",
+        )
+        communicator.scope["user"] = self.user1
+        communicator.scope["url_route"] = {"kwargs": {"room_id": self.room.id}}
+        await communicator.connect()
+        await communicator.receive_json_from()
+
+        await communicator.send_json_to(
+            {
+                "message": "written through",
+            }
+        )
+        await communicator.receive_json_from()
+        await communicator.disconnect()
+
+        cached_messages = [json.loads(message)["message"] for message in history_cache.get(self.room.id)]
+        self.assertEqual(cached_messages, ["cached message", "written through"])
+
+    @override_settings(CHAT_WRITE_BEHIND=True, CHAT_WRITE_BEHIND_BATCH_SIZE=100, CHAT_WRITE_BEHIND_FLUSH_INTERVAL=60)
+    async def test_write_behind_broadcasts_before_insert_and_flushes_on_disconnect(self):
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(),
+            f"/ws/chat/{self.room.id}/",
+        )
+        communicator.scope["user"] = self.user1
+        communicator.scope["url_route"] = {"kwargs": {"room_id": self.room.id}}
+        await communicator.connect()
+
+        await communicator.send_json_to({"message": "write behind"})
+        response = await communicator.receive_json_from()
+
+        self.assertEqual(response["message"], "write behind")
+        self.assertFalse(await Message.objects.filter(room=self.room).aexists())
+        self.assertEqual(len(message_write_buffer.pending), 1)
+
+        await communicator.disconnect()
+
+        message = await Message.objects.aget(room=self.room)
+        self.assertEqual(message.content, "write behind")
+        self.assertEqual(message.sender_id, self.user1.id)
+        self.assertEqual(message.created_at.isoformat(), response["created_at"])
+        self.assertEqual(message_write_buffer.pending, [])
+
+    @override_settings(CHAT_WRITE_BEHIND=True, CHAT_WRITE_BEHIND_BATCH_SIZE=2, CHAT_WRITE_BEHIND_FLUSH_INTERVAL=60)
+    async def test_write_behind_flushes_full_batch(self):
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(),
+            f"/ws/chat/{self.room.id}/",
+        )
+        communicator.scope["user"] = self.user1
+        communicator.scope["url_route"] = {"kwargs": {"room_id": self.room.id}}
+        await communicator.connect()
+
+        for i in range(2):
+            await communicator.send_json_to({"message": f"batched {i}"})
+            await communicator.receive_json_from()
+
+        self.assertEqual(await Message.objects.filter(room=self.room).acount(), 2)
+        await communicator.disconnect()
+
+
+class MessageWriteBufferTests(TestCase):
+    def setUp(self):
+        get_redis_client().flushdb()
+        self.user, other_user = [
+            get_user_model().objects.create_user(
+                username=f"buffer_user{i}",
+                email=f"buffer{i}@example.com",
+                password="BufferPass123",
+                date_of_birth="2000-01-01",
+            )
+            for i in range(2)
+        ]
+        self.room = Room.objects.get_or_create_room_with_members([self.user, other_user])
+        self.buffer = MessageWriteBuffer(cache=RoomMessageCache(size=10, ttl=60))
+
+    def buffered(self, message_id: int, content: str) -> tuple[Message, str]:
+        message = Message(id=message_id, sender=self.user, room=self.room, content=content)
+        return message, encode_message(message)
+
+    def test_rejected_rows_are_dead_lettered_without_blocking_the_batch(self):
+        existing = Message.objects.create(sender=self.user, room=self.room, content="already stored")
+        duplicate = self.buffered(existing.id, "duplicate id")
+        self.buffer.requeue([duplicate, self.buffered(existing.id + 1, "after the duplicate")])
+
+        self.buffer.flush_sync()
+
+        self.assertEqual(self.buffer.pending, [])
+        self.assertEqual(
+            list(Message.objects.filter(room=self.room).order_by("id").values_list("content", flat=True)),
+            ["already stored", "after the duplicate"],
+        )
+        self.assertEqual(get_redis_client().lrange(MESSAGE_DEAD_LETTER_KEY, 0, -1), [duplicate[1].encode()])
+
+        self.buffer.requeue([self.buffered(existing.id + 2, "next batch")])
+        self.buffer.flush_sync()
+        self.assertTrue(Message.objects.filter(content="next batch").exists())
+
+
+class RoomMessageCacheTests(TestCase):
+    def setUp(self):
+        get_redis_client().flushdb()
+        self.cache = RoomMessageCache(size=3, ttl=60)
+
+    def test_fill_and_append_keep_bounded_length(self):
+        self.assertIsNone(self.cache.get(1))
+
+        self.assertTrue(self.cache.fill(1, ["m1", "m2"], self.cache.get_version(1)))
+        self.cache.append(1, "m3")
+        self.cache.append(1, "m4")
+
+        self.assertEqual(self.cache.get(1), ["m2", "m3", "m4"])
+        self.assertLessEqual(get_redis_client().ttl(RoomMessageCache.messages_key(1)), 60)
+
+    def test_append_without_buffer_does_not_create_partial_history(self):
+        self.cache.append(1, "m1")
+
+        self.assertIsNone(self.cache.get(1))
+
+    def test_fill_is_discarded_when_a_message_raced_in(self):
+        version = self.cache.get_version(1)
+        self.cache.append(1, "m3")
+
+        self.assertFalse(self.cache.fill(1, ["m1", "m2"], version))
+        self.assertIsNone(self.cache.get(1))
+
+    def test_room_delete_invalidates_cache(self):
+        user1 = get_user_model().objects.create_user(
+            username="cache_user1",
+            email="cache1@example.com",
+            password="Cache1Pass123",
+            date_of_birth="2000-01-01",
+        )
+        user2 = get_user_model().objects.create_user(
+            username="cache_user2",
+            email="cache2@example.com",
+            password="Cache2Pass123",
+            date_of_birth="2000-01-01",
+        )
+        room = Room.objects.get_or_create_room_with_members([user1, user2])
+        self.cache.fill(room.id, ["m1"], self.cache.get_version(room.id))
+
+        room.delete()
+
+        self.assertIsNone(self.cache.get(room.id))
@@ -1,7 +1,16 @@
+import datetime
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.utils import timezone
 
-from matching_app.models import Message, Room
+from matching_app.models import Message, Recruitment, Room
+from matching_app.pkg.cursors import decode_cursor, encode_cursor
+from matching_app.pkg.recruitment_search import get_recruitment_search_backend
+from matching_app.pkg.times import get_age_from_date_of_birth, get_date_of_birth_range
 
 
 class UserModelsTestCase(TestCase):
@@ -35,6 +44,18 @@ class UserModelsTestCase(TestCase):
 
         superuser.delete()
 
+    def test_with_age_matches_age_from_date_of_birth(self):
+        for index, date_of_birth in enumerate(["2000-01-01", "2000-12-31", "2000-02-29", "1985-06-15"]):
+            get_user_model().objects.create_user(
+                username=f"testuser{index}",
+                email=f"test{index}@example.com",
+                password="password",
+                date_of_birth=date_of_birth,
+            )
+
+        for user in get_user_model().objects.with_age():
+            self.assertEqual(user.age, get_age_from_date_of_birth(user.date_of_birth))
+
 
 class BaseModelsTestCase(TestCase):
     def setUp(self):
@@ -52,6 +73,72 @@ class BaseModelsTestCase(TestCase):
         )
 
 
+class RecruitmentModelsTestCase(BaseModelsTestCase):
+    @skipUnless(connection.vendor == "sqlite", "checks the SQLite query plan")
+    def test_age_search_uses_date_of_birth_index(self):
+        born_after, born_on_or_before = get_date_of_birth_range(20, 30, datetime.date(2025, 6, 15))
+        recruitments = Recruitment.objects.select_related("user").filter(
+            user__date_of_birth__gt=born_after,
+            user__date_of_birth__lte=born_on_or_before,
+        )
+
+        query_plan = recruitments.explain()
+
+        self.assertIn("user_date_of_birth_idx", query_plan)
+
+    def test_timeline_page_breaks_created_at_ties_by_id(self):
+        created_at = timezone.now()
+        recruitments = Recruitment.objects.bulk_create(
+            Recruitment(user=self.user, title=f"Title {index}", content="Content") for index in range(5)
+        )
+        Recruitment.objects.update(created_at=created_at)
+
+        first_page, cursor = Recruitment.objects.get_timeline_page(limit=3)
+        second_page, last_cursor = Recruitment.objects.get_timeline_page(before=decode_cursor(encode_cursor(cursor)))
+
+        self.assertEqual(cursor, (created_at, recruitments[2].id))
+        self.assertIsNone(last_cursor)
+        self.assertEqual(
+            [recruitment.id for recruitment in first_page + second_page],
+            [recruitment.id for recruitment in reversed(recruitments)],
+        )
+
+    def test_search_ranks_matches_and_applies_age_filter(self):
+        get_recruitment_search_backend().reset()
+        older_user = get_user_model().objects.create_user(
+            username="olderuser",
+            email="older@example.com",
+            password="password",
+            date_of_birth="1970-01-01",
+        )
+        once = Recruitment.objects.create(user=self.user, title="Tennis", content="Anyone for a match?")
+        twice = Recruitment.objects.create(user=self.user2, title="Tennis partner", content="Weekly tennis")
+        Recruitment.objects.create(user=self.user, title="Hiking", content="Mountains on Sunday")
+        older = Recruitment.objects.create(user=older_user, title="Tennis", content="Doubles tennis")
+
+        first_page, next_offset = Recruitment.objects.search("TENNIS", limit=2)
+        second_page, last_offset = Recruitment.objects.search("tennis", offset=next_offset, limit=2)
+        born_after, born_on_or_before = get_date_of_birth_range(18, 40, datetime.date.today())
+        filtered, _ = Recruitment.objects.search("tennis", born_after=born_after, born_on_or_before=born_on_or_before)
+
+        self.assertEqual(first_page, [older, twice])
+        self.assertEqual((next_offset, second_page, last_offset), (2, [once], None))
+        self.assertEqual(filtered, [twice, once])
+
+    def test_search_index_follows_updates_and_deletes(self):
+        get_recruitment_search_backend().reset()
+        recruitment = Recruitment.objects.create(user=self.user, title="Tennis", content="Content")
+        self.assertEqual(Recruitment.objects.search("tennis")[0], [recruitment])
+
+        recruitment.title = "Hiking"
+        recruitment.save()
+        self.assertEqual(Recruitment.objects.search("tennis")[0], [])
+        self.assertEqual(Recruitment.objects.search("hiking")[0], [recruitment])
+
+        recruitment.delete()
+        self.assertEqual(Recruitment.objects.search("hiking")[0], [])
+
+
 class RoomModelsTestCase(BaseModelsTestCase):
     def test_create_room_success(self):
         room = Room.objects.get_or_create_room_with_members([self.user, self.user2])
@@ -61,6 +148,24 @@ class RoomModelsTestCase(BaseModelsTestCase):
         self.assertEqual(room.members.filter(id=self.user.id).count(), 1)
         self.assertEqual(room.members.filter(id=self.user2.id).count(), 1)
 
+    def test_get_existing_room_for_either_member_order(self):
+        room = Room.objects.get_or_create_room_with_members([self.user2, self.user])
+
+        self.assertEqual(Room.objects.get_or_create_room_with_members([self.user, self.user2]), room)
+        self.assertEqual(Room.objects.count(), 1)
+        self.assertEqual((room.low_user_id, room.high_user_id), tuple(sorted([self.user.id, self.user2.id])))
+
+    def test_room_member_pair_is_unique(self):
+        Room.objects.get_or_create_room_with_members([self.user, self.user2])
+        low_user, high_user = sorted([self.user, self.user2], key=lambda user: user.id)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Room.objects.create(low_user=low_user, high_user=high_user)
+
+    def test_create_room_with_same_user_fails(self):
+        with self.assertRaises(ValidationError):
+            Room.objects.get_or_create_room_with_members([self.user, self.user])
+
 
 class MessageModelsTestCase(BaseModelsTestCase):
     def test_create_message_success(self):
@@ -74,3 +179,35 @@ class MessageModelsTestCase(BaseModelsTestCase):
         self.assertEqual(message.sender, self.user)
         self.assertEqual(message.room, room)
         self.assertEqual(message.content, "Hello, world!")
+
+    def test_get_history_with_cursor(self):
+        room = Room.objects.get_or_create_room_with_members([self.user, self.user2])
+        messages = [Message.objects.create(sender=self.user, room=room, content=f"message {i}") for i in range(5)]
+
+        latest = Message.objects.get_history(room.id, limit=2)
+        older = Message.objects.get_history(room.id, before=(latest[0].created_at, latest[0].id), limit=2)
+
+        self.assertEqual(latest, messages[3:])
+        self.assertEqual(older, messages[1:3])
+
+    def test_create_message_updates_room_summary(self):
+        room = Room.objects.get_or_create_room_with_members([self.user, self.user2])
+        Message.objects.create(sender=self.user, room=room, content="first")
+        message = Message.objects.create(sender=self.user2, room=room, content="second")
+
+        room.refresh_from_db()
+        self.assertEqual(room.last_message_content, "second")
+        self.assertEqual(room.last_message_sender, self.user2)
+        self.assertEqual(room.last_message_at, message.created_at)
+        self.assertEqual(room.last_activity_at, message.created_at)
+
+    def test_record_last_message_ignores_older_message(self):
+        room = Room.objects.get_or_create_room_with_members([self.user, self.user2])
+        message = Message.objects.create(sender=self.user, room=room, content="newer")
+
+        Room.objects.record_last_message(
+            room.id, self.user2.id, "older", message.created_at - datetime.timedelta(seconds=1)
+        )
+
+        room.refresh_from_db()
+        self.assertEqual(room.last_message_content, "newer")
@@ -1,12 +1,47 @@
 import tempfile
+import threading
+from datetime import date, timedelta
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import Client, TestCase, TransactionTestCase, skipUnlessDBFeature
 from django.urls import reverse
 from PIL import Image
 
-from matching_app.models import Recruitment, User, UserLike, UserVerification
+from matching_app.models import (
+    EmailOutbox,
+    Match,
+    Message,
+    Recruitment,
+    Room,
+    User,
+    UserLike,
+    UserProfile,
+    UserRecommendation,
+    UserVerification,
+)
+from matching_app.models.user_verification import (
+    DEFAULT_VERIFICATION_EXPIRATION_MINUTES,
+    VERIFICATION_CODE_REUSE_MINUTES,
+)
+from matching_app.pkg.recruitment_search import get_recruitment_search_backend
+from matching_app.pkg.redis import get_redis_client
+from matching_app.pkg.timeline_cache import RecruitmentTimelineCache
+from matching_app.pkg.times import years_before
+from matching_app.views.user_like import USER_LIKE_LIST_PAGE_SIZE
+from matching_app.views.user_profile import USER_PROFILE_LIST_PAGE_SIZE
+from matching_app.views.verify import (
+    RESEND_PER_IP_CAPACITY,
+    RESEND_PER_USER_CAPACITY,
+    RESEND_PER_USER_REFILL_SECONDS,
+    resend_limiter_per_ip,
+    resend_limiter_per_user,
+)
 
 
 class SignupViewTests(TestCase):
@@ -39,6 +74,31 @@ class SignupViewTests(TestCase):
         self.assertRedirects(response, reverse("verify_email", args=[new_user.id]))
         self.assertFalse(new_user.is_active)
 
+    def test_signup_takes_over_pending_signup_with_same_email(self):
+        pending_user = User.objects.create_user(
+            username="pending_user",
+            email="pending@example.com",
+            password="PendingPass123",
+            date_of_birth="2000-01-01",
+            is_active=False,
+        )
+
+        response = self.client.post(
+            self.signup_url,
+            {
+                "username": "new_name",
+                "email": "pending@example.com",
+                "password": "NewPass123",
+                "date_of_birth": "1999-05-05",
+            },
+        )
+
+        self.assertRedirects(response, reverse("verify_email", args=[pending_user.id]))
+        user = User.objects.get(email="pending@example.com")
+        self.assertEqual((user.id, user.username), (pending_user.id, "new_name"))
+        self.assertTrue(user.check_password("NewPass123"))
+        self.assertFalse(user.is_active)
+
     def test_signup_failure_with_existing_user(self):
         response = self.client.post(
             self.signup_url,
@@ -56,6 +116,8 @@ class SignupViewTests(TestCase):
 
 class VerifyViewTests(TestCase):
     def setUp(self):
+        # rate limit buckets live in the cache, which outlives the rolled back test transactions
+        cache.clear()
         self.verify_user = get_user_model().objects.create_user(
             username="verify_user",
             email="verify@example.com",
@@ -98,6 +160,75 @@ class VerifyViewTests(TestCase):
         got_verify_user = User.objects.get(id=self.verify_user.id)
         self.assertFalse(got_verify_user.is_active)
 
+    def test_resend_requires_post(self):
+        self.assertEqual(self.client.get(self.send_verification_url).status_code, 405)
+
+    def test_resend_reuses_a_code_issued_moments_ago(self):
+        self.user_verification.set_expiration()
+        self.user_verification.save()
+        queued_emails = EmailOutbox.objects.count()
+
+        response = self.client.post(self.send_verification_url)
+
+        self.assertRedirects(response, self.verify_url)
+        self.assertEqual(UserVerification.objects.get(id=self.user_verification.id).verification_code, "123456")
+        self.assertEqual(EmailOutbox.objects.count(), queued_emails + 1)
+
+    def test_resend_replaces_a_code_after_the_reuse_window(self):
+        self.user_verification.set_expiration(
+            DEFAULT_VERIFICATION_EXPIRATION_MINUTES - VERIFICATION_CODE_REUSE_MINUTES - 1
+        )
+        self.user_verification.save()
+
+        self.client.post(self.send_verification_url)
+
+        self.assertNotEqual(UserVerification.objects.get(id=self.user_verification.id).verification_code, "123456")
+
+    def test_resend_for_an_active_user_sends_nothing(self):
+        active_user = get_user_model().objects.create_user(
+            username="active_user", email="active@example.com", password="ActivePass123", date_of_birth="2000-01-01"
+        )
+        UserVerification.objects.filter(user=active_user).delete()
+        queued_emails = EmailOutbox.objects.count()
+
+        response = self.client.post(reverse("send_new_verification_code", args=[active_user.id]))
+
+        self.assertRedirects(response, reverse("login"))
+        self.assertFalse(UserVerification.objects.filter(user=active_user).exists())
+        self.assertEqual(EmailOutbox.objects.count(), queued_emails)
+
+    def test_resend_is_rate_limited_per_user_before_any_query(self):
+        now = [1_000_000.0]
+        for limiter in (resend_limiter_per_user, resend_limiter_per_ip):
+            self.addCleanup(setattr, limiter, "clock", limiter.clock)
+            limiter.clock = lambda: now[0]
+
+        for _ in range(RESEND_PER_USER_CAPACITY):
+            self.assertEqual(self.client.post(self.send_verification_url).status_code, 302)
+        with self.assertNumQueries(0):
+            response = self.client.post(self.send_verification_url)
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, "Too many requests", status_code=429)
+
+        now[0] += RESEND_PER_USER_REFILL_SECONDS
+        self.assertEqual(self.client.post(self.send_verification_url).status_code, 302)
+        self.assertEqual(self.client.post(self.send_verification_url).status_code, 429)
+
+    def test_resend_is_rate_limited_per_ip_across_users(self):
+        now = [1_000_000.0]
+        self.addCleanup(setattr, resend_limiter_per_ip, "clock", resend_limiter_per_ip.clock)
+        resend_limiter_per_ip.clock = lambda: now[0]
+
+        statuses = [
+            self.client.post(reverse("send_new_verification_code", args=[user_id])).status_code
+            for user_id in range(1000, 1000 + RESEND_PER_IP_CAPACITY + 1)
+        ]
+
+        self.assertEqual(statuses[-1], 429)
+        self.assertNotIn(429, statuses[:-1])
+        other_ip = self.client.post(self.send_verification_url, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(other_ip.status_code, 302)
+
 
 class LoginViewTests(TestCase):
     def setUp(self):
@@ -225,6 +356,84 @@ class UserProfileViewTests(TestCase):
         self.assertIn("users", response.context)
         self.assertEqual(len(response.context["users"]), 1)
 
+    def test_user_profile_list_excludes_liked_and_inactive_users(self):
+        liked_user, inactive_user = [
+            get_user_model().objects.create_user(
+                username=f"hidden{i}",
+                email=f"hidden{i}@example.com",
+                password="HiddenPass123",
+                date_of_birth="2000-01-01",
+            )
+            for i in range(2)
+        ]
+        UserLike.objects.create(sender=self.user1, receiver=liked_user)
+        inactive_user.is_active = False
+        inactive_user.save()
+
+        response = self.client.get(reverse("user_profile_list"))
+
+        self.assertEqual(list(response.context["users"]), [self.user2])
+
+    def test_user_profile_list_keeps_active_users_after_a_verification_resend(self):
+        cache.clear()
+        self.client.logout()
+        self.client.post(reverse("send_new_verification_code", args=[self.user2.id]))
+        self.client.login(email=self.user1.email, password="User1Pass123")
+
+        response = self.client.get(reverse("user_profile_list"))
+
+        self.assertEqual(list(response.context["users"]), [self.user2])
+
+    def test_user_profile_list_pages_are_stable_within_session(self):
+        for i in range(USER_PROFILE_LIST_PAGE_SIZE + 5):
+            get_user_model().objects.create_user(
+                username=f"feed{i}",
+                email=f"feed{i}@example.com",
+                password="FeedPass123",
+                date_of_birth="2000-01-01",
+            )
+
+        first_page = list(self.client.get(reverse("user_profile_list")).context["users"])
+        second_page = list(self.client.get(reverse("user_profile_list"), {"page": 2}).context["users"])
+
+        self.assertEqual(len(first_page), USER_PROFILE_LIST_PAGE_SIZE)
+        self.assertEqual(len(second_page), 6)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertEqual(list(self.client.get(reverse("user_profile_list")).context["users"]), first_page)
+
+    def test_user_profile_list_serves_recommendations_in_rank_order(self):
+        user3 = get_user_model().objects.create_user(
+            username="user3",
+            email="user3@example.com",
+            password="User3Pass123",
+            date_of_birth="2000-01-01",
+        )
+        UserRecommendation.objects.create(user=self.user1, candidate=user3, score=2.0, rank=0)
+        UserRecommendation.objects.create(user=self.user1, candidate=self.user2, score=1.0, rank=1)
+
+        response = self.client.get(reverse("user_profile_list"))
+
+        self.assertEqual(list(response.context["users"]), [user3, self.user2])
+
+    def test_user_profile_list_follows_recommendations_with_everyone_else(self):
+        others = [
+            get_user_model().objects.create_user(
+                username=f"other{i}",
+                email=f"other{i}@example.com",
+                password="OtherPass123",
+                date_of_birth="2000-01-01",
+            )
+            for i in range(USER_PROFILE_LIST_PAGE_SIZE)
+        ]
+        UserRecommendation.objects.create(user=self.user1, candidate=others[-1], score=1.0, rank=0)
+
+        first_page = list(self.client.get(reverse("user_profile_list")).context["users"])
+        second_page = list(self.client.get(reverse("user_profile_list"), {"page": 2}).context["users"])
+
+        self.assertEqual(first_page[0], others[-1])
+        self.assertEqual(len(first_page) + len(second_page), len(others) + 1)
+        self.assertEqual(set(first_page) | set(second_page), {*others, self.user2})
+
     def test_get_user_profile_detail(self):
         response = self.client.get(reverse("user_profile_detail", kwargs={"pk": self.user2.id}))
         self.assertEqual(response.status_code, 200)
@@ -235,6 +444,8 @@ class UserProfileViewTests(TestCase):
 
 class RecruitmentViewTests(TestCase):
     def setUp(self):
+        # timeline pages and counters outlive the rolled back test transactions
+        cache.clear()
         self.user1 = User.objects.create_user(
             username="user1",
             email="user1@example.com",
@@ -312,12 +523,114 @@ class RecruitmentViewTests(TestCase):
         self.assertNotEqual(updated_recruitment.title, "Updated Title")
         self.assertNotEqual(updated_recruitment.content, "Updated Content")
 
+    def test_timeline_pages_with_cursor(self):
+        Recruitment.objects.bulk_create(
+            Recruitment(user=self.user2, title=f"Extra {index}", content="Content") for index in range(10)
+        )
+        expected_ids = list(Recruitment.objects.values_list("id", flat=True))
+        feed_url = reverse("recruitment_timeline_feed")
+
+        with self.assertNumQueries(3):
+            first_page = self.client.get(self.recruitment_timeline_url)
+        first_feed_page = self.client.get(feed_url).json()
+        second_feed_page = self.client.get(feed_url, {"cursor": first_feed_page["next_cursor"]}).json()
+
+        self.assertTrue(first_page.context["is_first_page"])
+        self.assertEqual(first_page.context["next_cursor"], first_feed_page["next_cursor"])
+        self.assertContains(first_page, "Extra 9")
+        self.assertNotContains(first_page, "Recruitment Title 1")
+        self.assertIsNone(second_feed_page["next_cursor"])
+        ids = [recruitment["id"] for recruitment in first_feed_page["recruitments"] + second_feed_page["recruitments"]]
+        self.assertEqual(ids, expected_ids)
+
+    def test_timeline_page_is_cached_until_a_recruitment_changes(self):
+        self.client.get(self.recruitment_timeline_url)
+
+        with self.assertNumQueries(2):
+            cached_page = self.client.get(self.recruitment_timeline_url)
+        self.assertContains(cached_page, "Recruitment Title 1")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recruitment1.title = "Renamed Title"
+            self.recruitment1.save()
+        page = self.client.get(self.recruitment_timeline_url)
+
+        self.assertContains(page, "Renamed Title")
+        self.assertEqual(RecruitmentTimelineCache.get_stats(), {"hits": 1, "misses": 2})
+
+    def test_timeline_cache_stats_requires_staff(self):
+        self.assertEqual(self.client.get(reverse("recruitment_timeline_cache_stats")).status_code, 403)
+
+        self.user1.is_staff = True
+        self.user1.save()
+        response = self.client.get(reverse("recruitment_timeline_cache_stats"))
+
+        self.assertEqual(response.json(), {"hits": 0, "misses": 0})
+
+    def test_timeline_feed_returns_json_page(self):
+        response = self.client.get(reverse("recruitment_timeline_feed"))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIsNone(data["next_cursor"])
+        self.assertEqual(
+            [recruitment["id"] for recruitment in data["recruitments"]],
+            [self.recruitment2.id, self.recruitment1.id],
+        )
+        self.assertEqual(data["recruitments"][0]["user"]["username"], "user2")
+        self.assertEqual(data["recruitments"][0]["url"], reverse("recruitment_detail", args=[self.recruitment2.id]))
+
+    def test_timeline_feed_rejects_invalid_cursor(self):
+        response = self.client.get(reverse("recruitment_timeline_feed"), {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_recruitment_by_keywords(self):
+        get_recruitment_search_backend().reset()
+        tennis = Recruitment.objects.create(user=self.user2, title="Tennis partner", content="Weekly tennis")
+
+        self.client.post(self.recruitment_search_url, {"keywords": " tennis ", "min_age": "", "max_age": ""})
+        response = self.client.get(self.recruitment_timeline_url)
+        feed = self.client.get(reverse("recruitment_timeline_feed"))
+
+        self.assertEqual(self.client.session["search_keywords"], "tennis")
+        self.assertEqual(response.context["keywords"], "tennis")
+        self.assertContains(response, "Tennis partner")
+        self.assertNotContains(response, "Recruitment Title 1")
+        self.assertEqual(feed.json()["recruitments"][0]["id"], tennis.id)
+        self.assertEqual(
+            self.client.get(reverse("recruitment_timeline_feed"), {"cursor": "not-an-offset"}).status_code, 400
+        )
+
     def test_delete_recruitment_success(self):
         response = self.client.delete(reverse("recruitment_delete", args=[self.recruitment1.id]))
 
         self.assertEqual(response.status_code, 200)
         self.assertFalse(Recruitment.objects.filter(id=self.recruitment1.id).exists())
 
+    def test_search_recruitment_by_age_on_birthday_boundaries(self):
+        thirty_years_ago = years_before(date.today(), 30)
+        turning_thirty = User.objects.create_user(
+            username="user3",
+            email="user3@example.com",
+            password="User3Pass123",
+            date_of_birth=thirty_years_ago + timedelta(days=1),
+        )
+        thirty = User.objects.create_user(
+            username="user4",
+            email="user4@example.com",
+            password="User4Pass123",
+            date_of_birth=thirty_years_ago,
+        )
+        Recruitment.objects.create(user=turning_thirty, title="Turning thirty", content="Content")
+        Recruitment.objects.create(user=thirty, title="Thirty", content="Content")
+
+        self.client.post(self.recruitment_search_url, {"min_age": 30, "max_age": 30})
+        response = self.client.get(self.recruitment_timeline_url)
+
+        self.assertContains(response, "Thirty")
+        self.assertNotContains(response, "Turning thirty")
+
     def test_delete_recruitment_invalid_access(self):
         response = self.client.delete(reverse("recruitment_delete", args=[self.recruitment2.id]))
 
@@ -373,6 +686,8 @@ class UserLikeViewTests(TestCase):
             sender=self.user4,
             receiver=self.login_user,
         )
+        Match.objects.sync_pair(self.login_user.id, self.user1.id)
+        UserProfile.objects.reconcile_like_counts()
 
         self.client.login(email=self.login_user.email, password="LoginPass123")
         self.user_like_list_url = reverse("user_like_list")
@@ -383,7 +698,10 @@ class UserLikeViewTests(TestCase):
         )
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), {"like_status": "liked"})
+        self.assertEqual(
+            response.json(),
+            {"like_status": "liked", "likes_received_count": 1, "likes_sent_count": 3},
+        )
         self.assertTrue(UserLike.objects.filter(sender=self.login_user, receiver=self.user2).exists())
 
     def test_user_like_toggle_delete_success(self):
@@ -392,9 +710,91 @@ class UserLikeViewTests(TestCase):
         )
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), {"like_status": "unliked"})
+        self.assertEqual(
+            response.json(),
+            {"like_status": "unliked", "likes_received_count": 0, "likes_sent_count": 1},
+        )
         self.assertFalse(UserLike.objects.filter(sender=self.login_user, receiver=self.user1).exists())
 
+    def test_user_like_toggle_updates_profile_counts(self):
+        self.client.post(reverse("user_like_toggle", args=[self.user2.id]))
+
+        self.user2.userprofile.refresh_from_db()
+        self.login_user.userprofile.refresh_from_db()
+        self.assertEqual(self.user2.userprofile.likes_received_count, 1)
+        self.assertEqual(self.login_user.userprofile.likes_sent_count, 3)
+
+    def test_user_like_toggle_reads_counts_once_and_locks_only_pairs_that_can_match(self):
+        # session and user lookups, the savepoint pair, then the profile read, DELETE, INSERT and counter UPDATE
+        with self.assertNumQueries(8):
+            response = self.client.post(reverse("user_like_toggle", args=[self.user2.id]))
+        self.assertEqual(response.json()["like_status"], "liked")
+
+        # user4 likes back, so the pair is locked and the match is counted and written as well
+        with self.assertNumQueries(11):
+            response = self.client.post(reverse("user_like_toggle", args=[self.user4.id]))
+        self.assertEqual(response.json()["likes_received_count"], 1)
+
+    def toggle_racing_a_like(self, receiver) -> HttpResponse:
+        """Toggle a like to `receiver` while a concurrent click inserts the same like between its DELETE and INSERT."""
+        insert_like = UserLike.objects.bulk_create
+
+        def racing_bulk_create(likes, **kwargs):
+            insert_like([UserLike(sender=self.login_user, receiver=receiver)])
+            return insert_like(likes, **kwargs)
+
+        with mock.patch.object(UserLike.objects, "bulk_create", side_effect=racing_bulk_create):
+            return self.client.post(reverse("user_like_toggle", args=[receiver.id]))
+
+    def test_user_like_toggle_racing_like_is_ignored(self):
+        response = self.toggle_racing_a_like(self.user2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(UserLike.objects.filter(sender=self.login_user, receiver=self.user2).count(), 1)
+        self.assertFalse(Match.objects.filter(user=self.login_user, matched_user=self.user2).exists())
+
+    def test_user_like_toggle_racing_like_keeps_match_in_step(self):
+        response = self.toggle_racing_a_like(self.user4)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(UserLike.objects.filter(sender=self.login_user, receiver=self.user4).count(), 1)
+        self.assertTrue(Match.objects.is_matched(self.login_user.id, self.user4.id))
+        self.assertTrue(Match.objects.is_matched(self.user4.id, self.login_user.id))
+
+    def test_user_like_toggle_after_a_racing_unlike_likes_again(self):
+        delete_rows = QuerySet.delete
+        raced = []
+
+        def racing_delete(rows):
+            if not raced:
+                # the concurrent click removed the like first, so this request's DELETE finds nothing
+                raced.append(delete_rows(UserLike.objects.filter(sender=self.login_user, receiver=self.user1)))
+            return delete_rows(rows)
+
+        with mock.patch.object(QuerySet, "delete", autospec=True, side_effect=racing_delete):
+            response = self.client.post(reverse("user_like_toggle", args=[self.user1.id]))
+
+        self.assertEqual(response.json()["like_status"], "liked")
+        self.assertEqual(UserLike.objects.filter(sender=self.login_user, receiver=self.user1).count(), 1)
+        self.assertTrue(Match.objects.is_matched(self.login_user.id, self.user1.id))
+
+    def test_user_like_toggle_missing_receiver_not_found(self):
+        response = self.client.post(reverse("user_like_toggle", args=[self.user4.id + 100]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(UserLike.objects.filter(receiver_id=self.user4.id + 100).exists())
+
+    def test_user_like_toggle_creates_and_removes_match(self):
+        toggle_url = reverse("user_like_toggle", args=[self.user4.id])
+
+        self.client.post(toggle_url)
+        self.assertTrue(Match.objects.is_matched(self.login_user.id, self.user4.id))
+        self.assertTrue(Match.objects.is_matched(self.user4.id, self.login_user.id))
+
+        self.client.post(toggle_url)
+        self.assertFalse(Match.objects.is_matched(self.login_user.id, self.user4.id))
+        self.assertFalse(Match.objects.is_matched(self.user4.id, self.login_user.id))
+
     def test_get_user_like_list_success(self):
         response = self.client.get(self.user_like_list_url)
 
@@ -412,3 +812,221 @@ class UserLikeViewTests(TestCase):
         self.assertIn(self.user1, response.context["matched_users"])
         self.assertIn(self.user4, response.context["senders"])
         self.assertIn(self.user3, response.context["receivers"])
+
+    def test_get_user_like_list_paginates_each_section(self):
+        for i in range(USER_LIKE_LIST_PAGE_SIZE + 1):
+            sender = User.objects.create_user(
+                username=f"fan{i}",
+                email=f"fan{i}@example.com",
+                password="FanPass123",
+                date_of_birth="2000-01-01",
+            )
+            UserLike.objects.create(sender=sender, receiver=self.login_user)
+
+        response = self.client.get(self.user_like_list_url, {"tab": "received", "received_page": 2})
+
+        self.assertEqual(response.context["active_tab"], "received")
+        self.assertEqual(response.context["senders"].number, 2)
+        self.assertEqual(response.context["senders"].paginator.count, USER_LIKE_LIST_PAGE_SIZE + 2)
+        self.assertEqual(len(response.context["senders"]), 2)
+        self.assertEqual(response.context["matched_users"].number, 1)
+
+    def test_user_like_list_query_count_does_not_grow_with_likes(self):
+        # session, user, then a count and a page for each of the three sections
+        with self.assertNumQueries(8):
+            self.client.get(self.user_like_list_url)
+
+
+class ChatRoomListViewTests(TestCase):
+    def setUp(self):
+        self.login_user = User.objects.create_user(
+            username="login_user",
+            email="login@example.com",
+            password="LoginPass123",
+            date_of_birth="2000-01-01",
+        )
+        self.others = [
+            User.objects.create_user(
+                username=f"chat_user{i}",
+                email=f"chat{i}@example.com",
+                password="ChatPass123",
+                date_of_birth="2000-01-01",
+            )
+            for i in range(3)
+        ]
+        self.rooms = [Room.objects.get_or_create_room_with_members([self.login_user, other]) for other in self.others]
+        for room, other in zip(self.rooms, self.others):
+            Message.objects.create(sender=other, room=room, content=f"hi {other.username}")
+
+        self.client.login(email=self.login_user.email, password="LoginPass123")
+        self.chat_room_list_url = reverse("chat_room_list")
+
+    def test_get_chat_room_list_success(self):
+        response = self.client.get(self.chat_room_list_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "chat_room_list.html")
+
+        opposite_members = list(response.context["opposite_members"])
+        self.assertEqual([member.user for member in opposite_members], list(reversed(self.others)))
+        self.assertEqual(opposite_members[0].room.last_message_content, "hi chat_user2")
+        self.assertContains(response, "hi chat_user0")
+
+    def test_chat_room_list_query_count_does_not_grow_with_rooms(self):
+        # session, user and the room list itself
+        with self.assertNumQueries(3):
+            self.client.get(self.chat_room_list_url)
+
+
+class ChatRoomViewTests(TestCase):
+    def setUp(self):
+        get_redis_client().flushdb()
+        self.login_user = User.objects.create_user(
+            username="login_user",
+            email="login@example.com",
+            password="LoginPass123",
+            date_of_birth="2000-01-01",
+        )
+        self.opposite_user = User.objects.create_user(
+            username="opposite_user",
+            email="opposite@example.com",
+            password="OppositePass123",
+            date_of_birth="2000-01-01",
+        )
+        self.other_user = User.objects.create_user(
+            username="other_user",
+            email="other@example.com",
+            password="OtherPass123",
+            date_of_birth="2000-01-01",
+        )
+        self.room = Room.objects.get_or_create_room_with_members([self.login_user, self.opposite_user])
+
+        self.client.login(email=self.login_user.email, password="LoginPass123")
+        self.chat_room_url = reverse("chat_room", args=[self.room.id])
+
+    def test_get_chat_room_success(self):
+        response = self.client.get(self.chat_room_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "chat_room.html")
+        self.assertEqual(response.context["opposite_user"].username, "opposite_user")
+
+    def test_get_chat_room_by_non_member_is_forbidden(self):
+        self.client.login(email=self.other_user.email, password="OtherPass123")
+
+        response = self.client.get(self.chat_room_url)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_missing_chat_room_not_found(self):
+        response = self.client.get(reverse("chat_room", args=[self.room.id + 1]))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_chat_room_membership_query_count(self):
+        # session and user, plus the membership only while the cache is cold
+        with self.assertNumQueries(3):
+            self.client.get(self.chat_room_url)
+        with self.assertNumQueries(2):
+            self.client.get(self.chat_room_url)
+
+    def test_profile_change_refreshes_membership(self):
+        self.client.get(self.chat_room_url)
+        self.opposite_user.username = "renamed_user"
+        self.opposite_user.save()
+
+        response = self.client.get(self.chat_room_url)
+
+        self.assertEqual(response.context["opposite_user"].username, "renamed_user")
+
+
+class ChatRoomCreateViewTests(TestCase):
+    def setUp(self):
+        self.login_user = User.objects.create_user(
+            username="login_user",
+            email="login@example.com",
+            password="LoginPass123",
+            date_of_birth="2000-01-01",
+        )
+        self.matched_user = User.objects.create_user(
+            username="matched_user",
+            email="matched@example.com",
+            password="MatchedPass123",
+            date_of_birth="2000-01-01",
+        )
+        self.other_user = User.objects.create_user(
+            username="other_user",
+            email="other@example.com",
+            password="OtherPass123",
+            date_of_birth="2000-01-01",
+        )
+        UserLike.objects.create(sender=self.login_user, receiver=self.matched_user)
+        UserLike.objects.create(sender=self.matched_user, receiver=self.login_user)
+        UserLike.objects.create(sender=self.login_user, receiver=self.other_user)
+        Match.objects.rebuild()
+
+        self.client.login(email=self.login_user.email, password="LoginPass123")
+
+    def test_create_chat_room_with_match_success(self):
+        response = self.client.post(reverse("chat_room_create", args=[self.matched_user.id]))
+
+        room = Room.objects.get(low_user=self.login_user, high_user=self.matched_user)
+        self.assertRedirects(response, reverse("chat_room", args=[room.id]), fetch_redirect_response=False)
+
+    def test_create_chat_room_without_match_is_forbidden(self):
+        response = self.client.post(reverse("chat_room_create", args=[self.other_user.id]))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Room.objects.exists())
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class UserLikeToggleConcurrencyTests(TransactionTestCase):
+    """Runs the toggle from several threads at once; needs row locks, so it is skipped on SQLite and runs on MySQL.
+
+    The interleavings it exercises are also checked deterministically, on any database, in UserLikeViewTests.
+    """
+
+    def setUp(self):
+        self.sender = User.objects.create_user(
+            username="sender",
+            email="sender@example.com",
+            password="SenderPass123",
+            date_of_birth="2000-01-01",
+        )
+        self.receiver = User.objects.create_user(
+            username="receiver",
+            email="receiver@example.com",
+            password="ReceiverPass123",
+            date_of_birth="2000-01-01",
+        )
+        UserLike.objects.create(sender=self.receiver, receiver=self.sender)
+        self.toggle_url = reverse("user_like_toggle", args=[self.receiver.id])
+
+    def post_toggles(self, toggle_count: int, barrier: threading.Barrier, status_codes: list) -> None:
+        client = Client()
+        client.force_login(self.sender)
+        barrier.wait()
+        try:
+            for _ in range(toggle_count):
+                status_codes.append(client.post(self.toggle_url).status_code)
+        finally:
+            connection.close()
+
+    def test_concurrent_toggles_keep_like_and_match_consistent(self):
+        thread_count, toggles_per_thread = 4, 5
+        barrier = threading.Barrier(thread_count)
+        status_codes = []
+        threads = [
+            threading.Thread(target=self.post_toggles, args=(toggles_per_thread, barrier, status_codes))
+            for _ in range(thread_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(status_codes, [200] * thread_count * toggles_per_thread)
+        # an even number of toggles leaves the like where it started
+        self.assertFalse(UserLike.objects.filter(sender=self.sender, receiver=self.receiver).exists())
+        self.assertFalse(Match.objects.filter(user__in=[self.sender, self.receiver]).exists())
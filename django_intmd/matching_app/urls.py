@@ -11,6 +11,8 @@ from matching_app.views.recruitment import (
     recruitment_detail,
     recruitment_search,
     recruitment_timeline,
+    recruitment_timeline_cache_stats,
+    recruitment_timeline_feed,
     recruitment_update,
 )
 from matching_app.views.signup import signup
@@ -35,6 +37,8 @@ urlpatterns = (
         path("profiles/<int:pk>/", user_profile_detail, name="user_profile_detail"),
         # Recruitment
         path("recruitments/", recruitment_timeline, name="recruitment_timeline"),
+        path("recruitments/feed/", recruitment_timeline_feed, name="recruitment_timeline_feed"),
+        path("recruitments/cache-stats/", recruitment_timeline_cache_stats, name="recruitment_timeline_cache_stats"),
         path("recruitments/<int:pk>/", recruitment_detail, name="recruitment_detail"),
         path("recruitments/create/", recruitment_create, name="recruitment_create"),
         path("recruitments/<int:pk>/update/", recruitment_update, name="recruitment_update"),
@@ -1,42 +1,144 @@
+from datetime import date
+from typing import Any, Callable, Optional
+
 import structlog
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import PermissionDenied
-from django.core.paginator import Paginator
+from django.core.exceptions import BadRequest, PermissionDenied
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 
 from matching_app.forms.recruitment import RecruitmentForm, SearchRecruitmentForm
 from matching_app.models import Recruitment
+from matching_app.pkg.cursors import decode_cursor, encode_cursor
+from matching_app.pkg.timeline_cache import RecruitmentTimelineCache
+from matching_app.pkg.times import get_date_of_birth_range
 
 RECRUITMENT_TIMELINE_PAGE_SIZE = 10
 
 logger = structlog.get_logger(__name__)
 
 
-@login_required
-@require_http_methods(["GET"])
-def recruitment_timeline(request: HttpRequest) -> HttpResponse:
-    min_age = request.session.get("search_min_age")
-    max_age = request.session.get("search_max_age")
+def get_page_filter(request: HttpRequest) -> dict:
+    born_after, born_on_or_before = get_date_of_birth_range(
+        request.session.get("search_min_age"), request.session.get("search_max_age"), date.today()
+    )
+    return {
+        "keywords": request.session.get("search_keywords"),
+        "cursor": request.GET.get("cursor"),
+        "born_after": born_after,
+        "born_on_or_before": born_on_or_before,
+    }
+
+
+def get_timeline_page(
+    keywords: Optional[str], cursor: Optional[str], born_after: Optional[date], born_on_or_before: Optional[date]
+) -> tuple[list[Recruitment], Optional[str]]:
+    """Return a page of the timeline, or of the keyword search results when keywords are set, and the next cursor.
+
+    Timeline cursors point at the last `(created_at, id)` shown; search results are ranked, so their cursor is an offset.
+    """
+    if keywords:
+        if cursor and not cursor.isdecimal():
+            logger.warning("Invalid search cursor", cursor=cursor)
+            raise BadRequest("Invalid cursor")
+        recruitments, next_offset = Recruitment.objects.search(
+            keywords,
+            offset=int(cursor) if cursor else 0,
+            limit=RECRUITMENT_TIMELINE_PAGE_SIZE,
+            born_after=born_after,
+            born_on_or_before=born_on_or_before,
+        )
+        return recruitments, str(next_offset) if next_offset else None
+
+    before = None
+    if cursor:
+        before = decode_cursor(cursor)
+        if before is None:
+            logger.warning("Invalid timeline cursor", cursor=cursor)
+            raise BadRequest("Invalid cursor")
+    recruitments, next_cursor = Recruitment.objects.get_timeline_page(
+        before=before,
+        limit=RECRUITMENT_TIMELINE_PAGE_SIZE,
+        born_after=born_after,
+        born_on_or_before=born_on_or_before,
+    )
+    return recruitments, encode_cursor(next_cursor) if next_cursor else None
+
+
+def get_cached_timeline_page(
+    request: HttpRequest, kind: str, render_page: Callable[[list[Recruitment]], Any]
+) -> tuple[Any, Optional[str]]:
+    """Return `render_page` of the requested page and the next cursor, from the timeline cache when possible."""
+    page_filter = get_page_filter(request)
+    timeline_cache = RecruitmentTimelineCache()
+    cache_key = timeline_cache.get_key(kind, page_filter)
+    page = timeline_cache.get(cache_key)
+    if page is None:
+        recruitments, next_cursor = get_timeline_page(**page_filter)
+        page = (render_page(recruitments), next_cursor)
+        timeline_cache.set(cache_key, page)
+    return page
+
+
+def serialize_recruitment(recruitment: Recruitment) -> dict:
+    return {
+        "id": recruitment.id,
+        "title": recruitment.title,
+        "content": recruitment.content,
+        "created_at": recruitment.created_at.isoformat(),
+        "url": reverse("recruitment_detail", args=[recruitment.id]),
+        "user": {
+            "id": recruitment.user.id,
+            "username": recruitment.user.username,
+            "icon_url": recruitment.user.icon.url if recruitment.user.icon else "",
+            "url": reverse("user_profile_detail", args=[recruitment.user.id]),
+        },
+    }
+
+
+def render_timeline_items(recruitments: list[Recruitment]) -> str:
+    return render_to_string("recruitment_timeline_items.html", {"recruitments": recruitments})
 
-    recruitments = Recruitment.objects.select_related("user").all()
-    if min_age:
-        recruitments = recruitments.filter(user__userprofile__age__gte=min_age)
-    if max_age:
-        recruitments = recruitments.filter(user__userprofile__age__lte=max_age)
 
-    pagenator = Paginator(recruitments, RECRUITMENT_TIMELINE_PAGE_SIZE)
-    page_number = request.GET.get("page", default=1)
-    page_obj = pagenator.page(page_number)
+def serialize_timeline_items(recruitments: list[Recruitment]) -> list[dict]:
+    return [serialize_recruitment(recruitment) for recruitment in recruitments]
 
+
+@login_required
+@require_http_methods(["GET"])
+def recruitment_timeline(request: HttpRequest) -> HttpResponse:
+    timeline_items, next_cursor = get_cached_timeline_page(request, "html", render_timeline_items)
     return render(
         request,
         "recruitment_timeline.html",
-        {"page_obj": page_obj},
+        {
+            "timeline_items": timeline_items,
+            "next_cursor": next_cursor,
+            "is_first_page": not request.GET.get("cursor"),
+            "keywords": request.session.get("search_keywords"),
+        },
     )
 
 
+@login_required
+@require_http_methods(["GET"])
+def recruitment_timeline_feed(request: HttpRequest) -> JsonResponse:
+    recruitments, next_cursor = get_cached_timeline_page(request, "json", serialize_timeline_items)
+    return JsonResponse({"recruitments": recruitments, "next_cursor": next_cursor})
+
+
+@login_required
+@require_http_methods(["GET"])
+def recruitment_timeline_cache_stats(request: HttpRequest) -> JsonResponse:
+    if not request.user.is_staff:
+        logger.warning("User is not staff", user=request.user)
+        raise PermissionDenied
+    return JsonResponse(RecruitmentTimelineCache.get_stats())
+
+
 @login_required
 @require_http_methods(["GET", "POST"])
 def recruitment_search(request: HttpRequest) -> HttpResponse:
@@ -45,11 +147,13 @@ def recruitment_search(request: HttpRequest) -> HttpResponse:
         if form.is_valid():
             request.session["search_min_age"] = form.cleaned_data["min_age"]
             request.session["search_max_age"] = form.cleaned_data["max_age"]
+            request.session["search_keywords"] = form.cleaned_data["keywords"]
             return redirect("recruitment_timeline")
         else:
             logger.error("invalid search recruitment form", form_errors=form.errors)
     else:
         initial = {
+            "keywords": request.session.get("search_keywords"),
             "min_age": request.session.get("search_min_age"),
             "max_age": request.session.get("search_max_age"),
         }
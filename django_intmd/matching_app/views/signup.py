@@ -8,6 +8,7 @@ from django.views.decorators.http import require_http_methods
 
 from matching_app.forms.signup import SignupForm
 from matching_app.models.user import User
+from matching_app.models.user_verification import UserVerification
 
 logger = structlog.get_logger(__name__)
 
@@ -28,22 +29,29 @@ def signup(request: HttpRequest) -> HttpResponse:
         password = form.cleaned_data["password"]
         date_of_birth = form.cleaned_data["date_of_birth"]
         user = User.objects.filter(email=email).first()
-        if user is not None:
-            if not user.is_active:
-                user.delete()
-            else:
-                messages.error(request, "Email already registered.")
-                logger.warning("email already registered", email=email)
-                return render(request, "signup_error.html")
+        if user is not None and user.is_active:
+            messages.error(request, "Email already registered.")
+            logger.warning("email already registered", email=email)
+            return render(request, "signup_error.html")
 
         with transaction.atomic():
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password,
-                date_of_birth=date_of_birth,
-                is_active=False,
-            )
+            if user is None:
+                user = User.objects.create_user(
+                    username=username,
+                    email=email,
+                    password=password,
+                    date_of_birth=date_of_birth,
+                    is_active=False,
+                )
+            else:
+                # take over the pending signup instead of deleting it and its related rows on this path;
+                # signups that are never finished are removed by the purge_unverified_users command
+                user.username = username
+                user.date_of_birth = date_of_birth
+                user.set_password(password)
+                user.save()
+                user_verification, _ = UserVerification.objects.get_or_create(user=user)
+                user_verification.send_new_verification_code()
 
         if user is None:
             messages.error(request, "Sorry, failed to create user. Please try again.")
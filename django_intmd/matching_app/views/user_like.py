@@ -1,47 +1,115 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponse, JsonResponse
-from django.shortcuts import get_object_or_404, render
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, PositiveIntegerField, Q, Value, When
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 
-from matching_app.models import UserLike
+from matching_app.models import Match, UserLike, UserProfile
+
+USER_LIKE_LIST_PAGE_SIZE = 20
+USER_LIKE_LIST_TABS = ("matched", "sent", "received")
+
+
+def shift_counter(counter: str, user_id: int, delta: int) -> Case:
+    """Add `delta` to the counter of `user_id`'s profile without letting a drifted counter go below zero."""
+    condition = Q(user_id=user_id) if delta > 0 else Q(user_id=user_id, **{f"{counter}__gt": 0})
+    return Case(When(condition, then=F(counter) + delta), default=F(counter), output_field=PositiveIntegerField())
 
 
 @login_required
 @require_http_methods(["POST"])
 def user_like_toggle(request: HttpRequest, receiver_id: int) -> JsonResponse:
-    receiver = get_object_or_404(get_user_model(), id=receiver_id)
-    user_like, created = UserLike.objects.get_or_create(
-        sender=request.user,
-        receiver=receiver,
-    )
-    like_status = "liked"
-    if not created:
-        user_like.delete()
-        like_status = "unliked"
+    liked_back = UserLike.objects.filter(sender_id=receiver_id, receiver=request.user)
+    with transaction.atomic():
+        # one read checks that the receiver exists, gives the counters the response is computed from and tells
+        # whether the pair can have a match at all
+        profiles = UserProfile.objects.filter(user_id__in=[request.user.id, receiver_id])
+        rows = list(
+            profiles.annotate(is_liked_back=Exists(liked_back)).values_list(
+                "user_id", "likes_received_count", "likes_sent_count", "is_liked_back"
+            )
+        )
+        counts = {user_id: (received, sent) for user_id, received, sent, _ in rows}
+        if receiver_id not in counts:
+            raise Http404("No User matches the given query.")
+
+        # only a pair where the receiver likes back can gain or lose a match; locking both users in id order then
+        # serializes toggles of the pair, which keeps the match in step with the likes
+        may_match = any(is_liked_back for *_, is_liked_back in rows)
+        if may_match:
+            list(
+                get_user_model()
+                .objects.select_for_update()
+                .filter(id__in=[request.user.id, receiver_id])
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
 
-    return JsonResponse({"like_status": like_status}, status=200)
+        deleted, _ = UserLike.objects.filter(sender=request.user, receiver_id=receiver_id).delete()
+        if deleted:
+            like_status = "unliked"
+            delta = -1
+        else:
+            # a second click racing this one may have its insert ignored; the counters it moves are then one off
+            # until reconcile_like_counts runs
+            UserLike.objects.bulk_create(
+                [UserLike(sender=request.user, receiver_id=receiver_id)], ignore_conflicts=True
+            )
+            like_status = "liked"
+            delta = 1
+        if may_match:
+            Match.objects.sync_pair(request.user.id, receiver_id)
+
+        # one UPDATE moves both counters, which also covers a user liking themselves
+        profiles.update(
+            likes_received_count=shift_counter("likes_received_count", receiver_id, delta),
+            likes_sent_count=shift_counter("likes_sent_count", request.user.id, delta),
+            likes_changed_at=Case(
+                When(user_id=request.user.id, then=Value(timezone.now())), default=F("likes_changed_at")
+            ),
+        )
+
+    return JsonResponse(
+        {
+            "like_status": like_status,
+            "likes_received_count": max(counts[receiver_id][0] + delta, 0),
+            "likes_sent_count": max(counts[request.user.id][1] + delta, 0),
+        },
+        status=200,
+    )
 
 
 @login_required
 @require_http_methods(["GET"])
 def user_like_list(request: HttpRequest) -> HttpResponse:
-    sent_user_likes = UserLike.objects.filter(sender=request.user).select_related("receiver")
-    received_user_likes = UserLike.objects.filter(receiver=request.user).select_related("sender")
+    users = get_user_model().objects
+    sent_like = UserLike.objects.filter(sender=request.user, receiver=OuterRef("pk"))
+    received_like = UserLike.objects.filter(sender=OuterRef("pk"), receiver=request.user)
 
-    all_receivers = [user_like.receiver for user_like in sent_user_likes]
-    all_senders = [user_like.sender for user_like in received_user_likes]
-    matched_users = list(set(all_receivers) & set(all_senders))
+    # the like sections join the user's own likes and check the reverse like with an indexed EXISTS
+    matched_users = users.filter(matched_by__user=request.user).order_by("-matched_by__created_at", "-id")
+    liked_users = users.filter(receiver__sender=request.user).order_by("-receiver__created_at", "-id")
+    liking_users = users.filter(sender__receiver=request.user).order_by("-sender__created_at", "-id")
+    receivers = liked_users.filter(~Exists(received_like))
+    senders = liking_users.filter(~Exists(sent_like))
 
-    receivers = [user for user in all_receivers if user not in matched_users]
-    senders = [user for user in all_senders if user not in matched_users]
+    active_tab = request.GET.get("tab", USER_LIKE_LIST_TABS[0])
+    if active_tab not in USER_LIKE_LIST_TABS:
+        active_tab = USER_LIKE_LIST_TABS[0]
 
     return render(
         request,
         "user_like_list.html",
         {
-            "matched_users": matched_users,
-            "receivers": receivers,
-            "senders": senders,
+            "matched_users": Paginator(matched_users, USER_LIKE_LIST_PAGE_SIZE).get_page(
+                request.GET.get("matched_page")
+            ),
+            "receivers": Paginator(receivers, USER_LIKE_LIST_PAGE_SIZE).get_page(request.GET.get("sent_page")),
+            "senders": Paginator(senders, USER_LIKE_LIST_PAGE_SIZE).get_page(request.GET.get("received_page")),
+            "active_tab": active_tab,
         },
     )
@@ -3,12 +3,21 @@ import random
 import structlog
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import Exists, F, FilteredRelation, OuterRef, Q
+from django.db.models.functions import Mod
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_http_methods
 
 from matching_app.forms.user_profile import UserForm, UserProfileForm
-from matching_app.models import UserLike
+from matching_app.models import Match, UserLike
+from matching_app.pkg.times import get_age_from_date_of_birth
+
+USER_PROFILE_LIST_PAGE_SIZE = 20
+DISCOVERY_SEED_SESSION_KEY = "discovery_seed"
+# the largest 32-bit prime, so that id * seed stays within a signed 64-bit integer for any realistic id
+DISCOVERY_SHUFFLE_MODULUS = 2_147_483_647
 
 logger = structlog.get_logger(__name__)
 
@@ -16,7 +25,15 @@ logger = structlog.get_logger(__name__)
 @login_required
 @require_http_methods(["GET"])
 def user_home(request: HttpRequest) -> HttpResponse:
-    return render(request, "user_home.html", {"user": request.user, "user_profile": request.user.userprofile})
+    return render(
+        request,
+        "user_home.html",
+        {
+            "user": request.user,
+            "user_profile": request.user.userprofile,
+            "age": get_age_from_date_of_birth(request.user.date_of_birth),
+        },
+    )
 
 
 @login_required
@@ -49,6 +66,7 @@ def user_profile_update(request: HttpRequest) -> HttpResponse:
             "user_form": user_form,
             "user_profile_form": user_profile_form,
             "user_profile": user_profile,
+            "age": get_age_from_date_of_birth(request.user.date_of_birth),
         },
     )
 
@@ -56,22 +74,48 @@ def user_profile_update(request: HttpRequest) -> HttpResponse:
 @login_required
 @require_http_methods(["GET"])
 def user_profile_list(request: HttpRequest) -> HttpResponse:
-    users = list(get_user_model().objects.all().exclude(id=request.user.id))
-    random.shuffle(users)
+    seed = request.session.get(DISCOVERY_SEED_SESSION_KEY)
+    if seed is None:
+        seed = random.randrange(1, DISCOVERY_SHUFFLE_MODULUS)
+        request.session[DISCOVERY_SEED_SESSION_KEY] = seed
+
+    liked = UserLike.objects.filter(sender=request.user, receiver=OuterRef("pk"))
+    users = (
+        get_user_model()
+        .objects.filter(is_active=True)
+        .exclude(id=request.user.id)
+        .filter(~Exists(liked))
+        .select_related("userprofile")
+    )
+
+    # ranked candidates from rescore_recommendations come first, then everyone else;
+    # (id * seed) mod p is a permutation of the ids for a prime p, so the rest is shuffled per session
+    # but stable across pages, and the database only returns the requested page
+    users = users.annotate(
+        recommendation=FilteredRelation("recommended_to", condition=Q(recommended_to__user=request.user))
+    )
+    paginator = Paginator(
+        users.order_by(
+            F("recommendation__rank").asc(nulls_last=True), Mod(F("id") * seed, DISCOVERY_SHUFFLE_MODULUS), "id"
+        ),
+        USER_PROFILE_LIST_PAGE_SIZE,
+    )
+    page_obj = paginator.get_page(request.GET.get("page"))
     return render(
         request,
         "user_profile_list.html",
-        {"users": users},
+        {"users": page_obj, "page_obj": page_obj},
     )
 
 
 @login_required
 @require_http_methods(["GET"])
 def user_profile_detail(request: HttpRequest, pk: int) -> HttpResponse:
-    user = get_object_or_404(get_user_model().objects.select_related("userprofile"), pk=pk)
+    user = get_object_or_404(get_user_model().objects.with_age().select_related("userprofile"), pk=pk)
     is_like = UserLike.objects.filter(sender=request.user, receiver=user).exists()
+    is_matched = Match.objects.is_matched(request.user.id, user.id)
     return render(
         request,
         "user_profile_detail.html",
-        {"user": user, "is_like": is_like},
+        {"user": user, "is_like": is_like, "is_matched": is_matched},
     )
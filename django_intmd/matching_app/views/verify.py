@@ -7,9 +7,23 @@ from django.views.decorators.http import require_http_methods
 
 from matching_app.forms.verify import VerifyEmailForm
 from matching_app.models.user_verification import UserVerification
+from matching_app.pkg.rate_limit import TokenBucketRateLimiter, get_client_ip
 
 logger = structlog.get_logger(__name__)
 
+# a burst of 3 resends per user, then one every 5 minutes; a shared address gets more room
+RESEND_PER_USER_CAPACITY = 3
+RESEND_PER_USER_REFILL_SECONDS = 5 * 60
+RESEND_PER_IP_CAPACITY = 20
+RESEND_PER_IP_REFILL_SECONDS = 30
+
+resend_limiter_per_user = TokenBucketRateLimiter(
+    "verification_resend:user", RESEND_PER_USER_CAPACITY, RESEND_PER_USER_REFILL_SECONDS
+)
+resend_limiter_per_ip = TokenBucketRateLimiter(
+    "verification_resend:ip", RESEND_PER_IP_CAPACITY, RESEND_PER_IP_REFILL_SECONDS
+)
+
 
 @require_http_methods(["POST", "GET"])
 def verify_email(request: HttpRequest, id: int) -> HttpResponse:
@@ -51,9 +65,30 @@ def verify_email(request: HttpRequest, id: int) -> HttpResponse:
         return render(request, "verify_email.html", {"form": form, "id": id})
 
 
+@require_http_methods(["POST"])
 def send_new_verification_code(request: HttpRequest, id: int) -> HttpResponse:
+    # checked before any database or mail work, so a flood of requests stays cheap
+    client_ip = get_client_ip(request)
+    if not resend_limiter_per_ip.allow(client_ip) or not resend_limiter_per_user.allow(str(id)):
+        logger.warning("verification code resend rate limited", user_id=id, client_ip=client_ip)
+        return render(
+            request,
+            "verify_email.html",
+            {
+                "form": VerifyEmailForm(),
+                "id": id,
+                "resend_error": "Too many requests. Please wait a few minutes and try again.",
+            },
+            status=429,
+        )
+
     user = get_object_or_404(get_user_model(), id=id)
+    if user.is_active:
+        # already verified; a new code would only leave a stray verification row behind
+        logger.info("verification code resend for an active user", user=user)
+        return redirect("login")
+
     user_verification, _ = UserVerification.objects.get_or_create(user=user)
-    user_verification.send_new_verification_code()
+    user_verification.resend_verification_code()
 
     return redirect("verify_email", id=id)
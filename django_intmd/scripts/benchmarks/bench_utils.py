@@ -0,0 +1,50 @@
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+
+def setup_django(settings_module: str = "django_intmd.settings.test") -> None:
+    """Configure Django against a throwaway SQLite file and apply migrations.
+
+    A file database is used instead of the in-memory one from the test settings so that
+    `database_sync_to_async` worker threads see the same data as the main thread.
+    """
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+    from django.conf import settings
+
+    database_file = tempfile.NamedTemporaryFile(prefix="benchmark_", suffix=".sqlite3", delete=False)
+    settings.DATABASES["default"]["NAME"] = database_file.name
+    # user creation sends a verification mail; keep it in memory
+    settings.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+@contextmanager
+def timer() -> Iterator[list[float]]:
+    elapsed = []
+    started_at = time.perf_counter()
+    yield elapsed
+    elapsed.append(time.perf_counter() - started_at)
+
+
+def summarize(label: str, samples: list[float], unit: str = "ms", scale: float = 1000) -> str:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else samples[-1]
+    return (
+        f"{label:<24} mean={statistics.mean(samples) * scale:8.2f}{unit} "
+        f"p50={statistics.median(samples) * scale:8.2f}{unit} p95={p95 * scale:8.2f}{unit}"
+    )
@@ -0,0 +1,92 @@
+"""Compare per-message and batched chat history replay on WebSocket connect.
+
+Usage (from the django_intmd directory):
+    python scripts/benchmarks/chat_history_replay.py --messages 50 --connections 200
+"""
+
+import argparse
+import asyncio
+import time
+
+from bench_utils import setup_django, summarize
+
+setup_django()
+
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+
+from matching_app.channels.chat_consumer import CHAT_HISTORY_PAGE_SIZE, ChatConsumer  # noqa: E402
+from matching_app.models import Message, Room, User  # noqa: E402
+
+
+def create_room(message_count: int) -> tuple[Room, User]:
+    users = [
+        get_user_model().objects.create_user(
+            username=f"bench_user{i}",
+            email=f"bench{i}@example.com",
+            password="BenchPass123",
+            date_of_birth="2000-01-01",
+        )
+        for i in range(2)
+    ]
+    room = Room.objects.get_or_create_room_with_members(users)
+    Message.objects.bulk_create(
+        [
+            Message(sender=users[i % 2], room=room, content=f"benchmark message {i} " + "x" * 80)
+            for i in range(message_count)
+        ]
+    )
+    return room, users[0]
+
+
+async def replay(room: Room, user: User, history_mode: str, expected_messages: int) -> tuple[float, int]:
+    communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{room.id}/?history={history_mode}")
+    communicator.scope["user"] = user
+    communicator.scope["url_route"] = {"kwargs": {"room_id": room.id}}
+
+    started_at = time.perf_counter()
+    await communicator.connect()
+    frames = 0
+    received_messages = 0
+    while received_messages < expected_messages:
+        frame = await communicator.receive_json_from()
+        frames += 1
+        received_messages += len(frame["messages"]) if "messages" in frame else 1
+    elapsed = time.perf_counter() - started_at
+
+    await communicator.disconnect()
+    return elapsed, frames
+
+
+async def run(room: Room, user: User, history_mode: str, connections: int, expected_messages: int) -> None:
+    latencies = []
+    total_frames = 0
+    started_at = time.perf_counter()
+    for _ in range(connections):
+        elapsed, frames = await replay(room, user, history_mode, expected_messages)
+        latencies.append(elapsed)
+        total_frames += frames
+    total_elapsed = time.perf_counter() - started_at
+
+    print(summarize(f"{history_mode} connect", latencies))
+    print(
+        f"{history_mode + ' frames':<24} {total_frames / connections:.0f} frames/connect, "
+        f"{total_frames / total_elapsed:,.0f} frames/s, {connections * expected_messages / total_elapsed:,.0f} messages/s, "
+        f"{connections / total_elapsed:,.1f} connects/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=CHAT_HISTORY_PAGE_SIZE)
+    parser.add_argument("--connections", type=int, default=200)
+    args = parser.parse_args()
+
+    room, user = create_room(args.messages)
+    expected_messages = min(args.messages, CHAT_HISTORY_PAGE_SIZE)
+    for history_mode in ("stream", "batch"):
+        asyncio.run(run(room, user, history_mode, args.connections, expected_messages))
+
+
+if __name__ == "__main__":
+    main()
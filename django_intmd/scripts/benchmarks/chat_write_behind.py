@@ -0,0 +1,84 @@
+"""Compare chat message throughput with direct inserts and with write-behind batching.
+
+Usage (from the django_intmd directory):
+    python scripts/benchmarks/chat_write_behind.py --messages 2000 --batch-size 100
+"""
+
+import argparse
+import asyncio
+import time
+
+from bench_utils import setup_django
+
+setup_django()
+
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from matching_app.channels.chat_consumer import ChatConsumer  # noqa: E402
+from matching_app.models import Message, Room, User  # noqa: E402
+
+
+def create_room() -> tuple[Room, User]:
+    users = [
+        get_user_model().objects.create_user(
+            username=f"bench_user{i}",
+            email=f"bench{i}@example.com",
+            password="BenchPass123",
+            date_of_birth="2000-01-01",
+        )
+        for i in range(2)
+    ]
+    return Room.objects.get_or_create_room_with_members(users), users[0]
+
+
+async def send_burst(room: Room, user: User, message_count: int) -> tuple[float, float]:
+    communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f"/ws/chat/{room.id}/?history=batch")
+    communicator.scope["user"] = user
+    communicator.scope["url_route"] = {"kwargs": {"room_id": room.id}}
+    await communicator.connect()
+    await communicator.receive_json_from()
+
+    started_at = time.perf_counter()
+    for i in range(message_count):
+        await communicator.send_json_to({"message": f"burst message {i}"})
+        await communicator.receive_json_from()
+    broadcast_elapsed = time.perf_counter() - started_at
+
+    # disconnect flushes whatever the write buffer still holds
+    await communicator.disconnect()
+    durable_elapsed = time.perf_counter() - started_at
+    return broadcast_elapsed, durable_elapsed
+
+
+def run(label: str, room: Room, user: User, message_count: int) -> None:
+    Message.objects.filter(room=room).delete()
+    broadcast_elapsed, durable_elapsed = asyncio.run(send_burst(room, user, message_count))
+    stored = Message.objects.filter(room=room).count()
+    print(
+        f"{label:<24} broadcast {message_count / broadcast_elapsed:8,.0f} msg/s, "
+        f"durable {message_count / durable_elapsed:8,.0f} msg/s, stored {stored}/{message_count}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    room, user = create_room()
+    with override_settings(CHAT_WRITE_BEHIND=False):
+        run("direct insert", room, user, args.messages)
+    with override_settings(
+        CHAT_WRITE_BEHIND=True,
+        CHAT_WRITE_BEHIND_BATCH_SIZE=args.batch_size,
+        CHAT_WRITE_BEHIND_FLUSH_INTERVAL=args.flush_interval,
+    ):
+        run(f"write-behind ({args.batch_size})", room, user, args.messages)
+
+
+if __name__ == "__main__":
+    main()
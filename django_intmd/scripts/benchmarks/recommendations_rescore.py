@@ -0,0 +1,85 @@
+"""Time the recommendation rescore job with one and with several worker processes.
+
+Usage (from the django_intmd directory):
+    python scripts/benchmarks/recommendations_rescore.py --users 2000 --likes-per-user 20 --workers 4
+"""
+
+import argparse
+import random
+import time
+from datetime import date
+from io import StringIO
+
+from bench_utils import setup_django
+
+setup_django()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db.models.signals import post_save  # noqa: E402
+
+from matching_app.models import User, UserLike, UserProfile, UserRecommendation  # noqa: E402
+from matching_app.models.user import create_OneToOnes  # noqa: E402
+
+ADDRESSES = ["Tokyo", "Osaka", "Nagoya", "Fukuoka", "Sapporo"]
+OCCUPATIONS = ["engineer", "designer", "teacher", "nurse", "writer", ""]
+
+
+def create_users(user_count: int, likes_per_user: int) -> None:
+    # bulk inserts skip the signup signal, so profiles are created here
+    post_save.disconnect(create_OneToOnes, sender=User)
+    password = make_password("BenchPass123")
+    users = User.objects.bulk_create(
+        User(
+            username=f"bench_user{i}",
+            email=f"bench{i}@example.com",
+            password=password,
+            date_of_birth=date(random.randint(1965, 2005), random.randint(1, 12), random.randint(1, 28)),
+        )
+        for i in range(user_count)
+    )
+    UserProfile.objects.bulk_create(
+        UserProfile(
+            user=user,
+            address=random.choice(ADDRESSES),
+            occupation=random.choice(OCCUPATIONS),
+        )
+        for user in users
+    )
+    user_ids = [user.id for user in users]
+    UserLike.objects.bulk_create(
+        (
+            UserLike(sender_id=user_id, receiver_id=receiver_id)
+            for user_id in user_ids
+            for receiver_id in random.sample(user_ids, likes_per_user)
+            if receiver_id != user_id
+        ),
+        batch_size=5000,
+    )
+
+
+def time_rescore(workers: int) -> float:
+    UserRecommendation.objects.all().delete()
+    started_at = time.perf_counter()
+    call_command("rescore_recommendations", "--full", f"--workers={workers}", stdout=StringIO())
+    return time.perf_counter() - started_at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--likes-per-user", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    random.seed(0)
+    create_users(args.users, args.likes_per_user)
+
+    for workers in (1, args.workers):
+        elapsed = time_rescore(workers)
+        print(f"workers={workers:<3} elapsed={elapsed:8.2f}s users/s={args.users / elapsed:8.1f}")
+    print(f"stored {UserRecommendation.objects.count()} recommendations")
+
+
+if __name__ == "__main__":
+    main()
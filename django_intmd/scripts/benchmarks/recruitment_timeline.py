@@ -0,0 +1,85 @@
+"""Compare offset (Paginator) and keyset (cursor) pages of the recruitment timeline at several depths.
+
+Usage (from the django_intmd directory):
+    python scripts/benchmarks/recruitment_timeline.py --recruitments 1000000 --repeat 20
+"""
+
+import argparse
+
+from bench_utils import setup_django, summarize, timer
+
+setup_django()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models.signals import post_save  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from matching_app.models import Recruitment, User  # noqa: E402
+from matching_app.models.user import create_OneToOnes  # noqa: E402
+from matching_app.views.recruitment import RECRUITMENT_TIMELINE_PAGE_SIZE  # noqa: E402
+
+USER_COUNT = 1000
+INSERT_BATCH_SIZE = 10000
+
+
+def create_recruitments(recruitment_count: int) -> None:
+    post_save.disconnect(create_OneToOnes, sender=User)
+    password = make_password("BenchPass123")
+    users = User.objects.bulk_create(
+        User(username=f"bench_user{i}", email=f"bench{i}@example.com", password=password, date_of_birth="2000-01-01")
+        for i in range(USER_COUNT)
+    )
+    for start in range(0, recruitment_count, INSERT_BATCH_SIZE):
+        Recruitment.objects.bulk_create(
+            Recruitment(user=users[i % USER_COUNT], title=f"Recruitment {i}", content="benchmark " + "x" * 200)
+            for i in range(start, min(start + INSERT_BATCH_SIZE, recruitment_count))
+        )
+
+
+def offset_page(page_number: int) -> list[Recruitment]:
+    paginator = Paginator(Recruitment.objects.select_related("user"), RECRUITMENT_TIMELINE_PAGE_SIZE)
+    page = paginator.page(page_number)
+    return list(page)
+
+
+def keyset_page(before: tuple) -> list[Recruitment]:
+    recruitments, _ = Recruitment.objects.get_timeline_page(before=before, limit=RECRUITMENT_TIMELINE_PAGE_SIZE)
+    return recruitments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recruitments", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    create_recruitments(args.recruitments)
+    print(f"created {args.recruitments:,} recruitments")
+
+    page_count = args.recruitments // RECRUITMENT_TIMELINE_PAGE_SIZE
+    for page_number in sorted({1, 100, page_count // 2, page_count}):
+        # the cursor a client would hold after scrolling to this page: the last row of the previous page
+        offset = (page_number - 1) * RECRUITMENT_TIMELINE_PAGE_SIZE
+        before = None
+        if offset:
+            before = Recruitment.objects.order_by("-created_at", "-id").values_list("created_at", "id")[offset - 1]
+
+        offset_samples, keyset_samples = [], []
+        for _ in range(args.repeat):
+            with timer() as elapsed, CaptureQueriesContext(connection) as offset_queries:
+                offset_rows = offset_page(page_number)
+            offset_samples.extend(elapsed)
+            with timer() as elapsed, CaptureQueriesContext(connection) as keyset_queries:
+                keyset_rows = keyset_page(before)
+            keyset_samples.extend(elapsed)
+        assert [row.id for row in offset_rows] == [row.id for row in keyset_rows]
+
+        print(f"page {page_number:,}")
+        print(summarize(f"  offset ({len(offset_queries)} queries)", offset_samples))
+        print(summarize(f"  keyset ({len(keyset_queries)} queries)", keyset_samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Count database queries per request with database sessions and with cached_db sessions.
+
+The production profile keeps sessions in Redis (cached_db); here the locmem cache of the test settings stands in for it.
+
+Usage (from the django_intmd directory):
+    python scripts/benchmarks/session_queries.py --requests 200
+"""
+
+import argparse
+import statistics
+
+from bench_utils import setup_django, summarize, timer
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from matching_app.models import Recruitment, User  # noqa: E402
+
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+}
+
+
+def create_user() -> User:
+    user = User.objects.create_user(
+        username="bench_user",
+        email="bench@example.com",
+        password="BenchPass123",
+        date_of_birth="2000-01-01",
+        is_active=True,
+    )
+    user.userverification.delete()
+    Recruitment.objects.bulk_create(
+        Recruitment(user=user, title=f"Recruitment {i}", content="benchmark content") for i in range(50)
+    )
+    return user
+
+
+def measure(client: Client, method: str, url: str, data: dict, request_count: int) -> None:
+    query_counts, session_query_counts, latencies = [], [], []
+    for _ in range(request_count):
+        with timer() as elapsed, CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, data)
+        assert response.status_code in (200, 302), response.status_code
+        latencies.extend(elapsed)
+        query_counts.append(len(queries))
+        session_query_counts.append(sum("django_session" in query["sql"] for query in queries))
+    print(summarize(f"  {method.upper()} {url}", latencies))
+    print(
+        f"  {'':<22} queries/request={statistics.mean(query_counts):.2f} "
+        f"session queries/request={statistics.mean(session_query_counts):.2f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    user = create_user()
+    for name, engine in SESSION_ENGINES.items():
+        with override_settings(SESSION_ENGINE=engine, ALLOWED_HOSTS=["testserver"]):
+            client = Client()
+            client.force_login(user)
+            print(name)
+            measure(client, "get", reverse("user_home"), {}, args.requests)
+            measure(client, "get", reverse("recruitment_timeline"), {}, args.requests)
+            measure(
+                client,
+                "post",
+                reverse("recruitment_search"),
+                {"keywords": "", "min_age": "20", "max_age": "40"},
+                args.requests,
+            )
+
+
+if __name__ == "__main__":
+    main()
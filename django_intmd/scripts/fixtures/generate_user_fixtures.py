@@ -38,23 +38,12 @@ biographies = [
 base_date = datetime(2025, 1, 1)
 
 
-def get_age_from_date_of_birth(date_of_birth: datetime) -> int:
-    today = datetime.now()
-    if date_of_birth.month < today.month:
-        return today.year - date_of_birth.year
-    elif date_of_birth.month == today.month and date_of_birth.day <= today.day:
-        return today.year - date_of_birth.year
-    else:
-        return today.year - date_of_birth.year - 1
-
-
 def generate_user_fixtures() -> list[dict]:
     fixtures = []
     for i in range(1, MAX_USERS + 1):
         date_str = base_date.strftime("%Y-%m-%d %H:%M:%S")
         date_of_birth = datetime(random.randint(min_date_of_birth, max_date_of_birth), 1, 1)
         date_of_birth_str = date_of_birth.strftime("%Y-%m-%d")
-        age = get_age_from_date_of_birth(date_of_birth)
 
         user = {
             "model": "matching_app.user",
@@ -71,7 +60,6 @@ def generate_user_fixtures() -> list[dict]:
             "pk": i,
             "fields": {
                 "user": i,
-                "age": age,
                 "address": random.choice(addresses),
                 "occupation": random.choice(occupations),
                 "biography": random.choice(biographies),